@@ -0,0 +1,146 @@
+"""Generate a synthetic database: players, then Swiss tournaments with plausible results.
+
+Usage: python -m benchmarks.generator DB_PATH [--players N] [--tournaments M] [--rounds K] [--competitors C]
+                                      [--seed SEED] [--backend {tinydb,sqlite}]
+
+The same arguments always produce the same database. Rounds are paired as the engine pairs them, and the
+outcome of a match is drawn from the Elo expected score of the players, with a share of draws that grows
+as the players are closer.
+"""
+
+import argparse
+import random
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from chesstournament.controllers.pairing import make_pairings
+from chesstournament.models.database import PlayersRegistry, TournamentsRegistry, create_database
+from chesstournament.models.player import Player, TournamentPlayer
+from chesstournament.models.storage import Backend
+from chesstournament.models.tournament import Tournament, TIME_CONTROLS, TIME_FORMAT_ROUND, TIME_FORMAT_TOURNAMENT
+
+DEFAULT_PLAYERS = 1000
+DEFAULT_TOURNAMENTS = 50
+DEFAULT_ROUNDS = 7
+DEFAULT_COMPETITORS = 64
+SEED = 42
+
+# Share of draws between players of the same strength, fewer draws as the Elo gap grows.
+DRAW_RATE = 0.3
+FIRST_DATE = date(2010, 1, 1)
+
+FIRST_NAMES = ('Alice', 'Bruno', 'Chloé', 'David', 'Emma', 'François', 'Gaëlle', 'Hugo', 'Inès', 'Jules',
+               'Kevin', 'Léa', 'Marc', 'Nina', 'Olivier', 'Pauline', 'Quentin', 'Rose', 'Samuel', 'Théo')
+LAST_NAMES = ('Martin', 'Bernard', 'Dubois', 'Thomas', 'Robert', 'Richard', 'Petit', 'Durand', 'Leroy', 'Moreau',
+              'Simon', 'Laurent', 'Lefèvre', 'Michel', 'Garcia', 'David', 'Bertrand', 'Roux', 'Vincent', 'Fournier')
+
+
+def generate_players(number_of_players: int, rng: random.Random) -> List[Player]:
+    """Create players with Elo ratings spread around 1600."""
+    return [Player(rng.choice(FIRST_NAMES), f"{rng.choice(LAST_NAMES)}{idx}",
+                   f"{rng.randint(1950, 2010)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}", rng.choice('mf'),
+                   min(2800, max(1000, round(rng.gauss(1600, 300)))))
+            for idx in range(number_of_players)]
+
+
+def generate_tournament(players: List[Player], number_of_rounds: int, rng: random.Random,
+                        rounds_played: Optional[int] = None, last_round_results: bool = True,
+                        start_date: date = FIRST_DATE) -> Tournament:
+    """Create a tournament between 'players' (saved players, i.e. with an id) and play its first rounds.
+
+    'rounds_played' defaults to all the rounds, the last round played is left without results when
+    'last_round_results' is False.
+    """
+    rounds_played = number_of_rounds if rounds_played is None else rounds_played
+    tournament = Tournament(f"{rng.choice(('Open', 'Blitz', 'Masters', 'Cup'))} {start_date.year}",
+                            rng.choice(('Paris', 'Lyon', 'Lille', 'Nantes')), number_of_rounds,
+                            rng.choice(TIME_CONTROLS), 'A generated tournament.',
+                            start_date.strftime(TIME_FORMAT_TOURNAMENT),
+                            competitors=[TournamentPlayer.from_player(player) for player in players])
+
+    for round_idx in range(rounds_played):
+        is_last = round_idx == rounds_played - 1
+        play_round(tournament, rng, datetime.combine(start_date, datetime.min.time()) + timedelta(hours=3 * round_idx),
+                   with_results=last_round_results or not is_last)
+
+    if rounds_played == number_of_rounds and last_round_results:
+        tournament.end_date = tournament.start_date
+    return tournament
+
+
+def play_round(tournament: Tournament, rng: random.Random, start: datetime, with_results: bool = True) -> None:
+    """Pair the next round of 'tournament' as the engine does and, optionally, play and finish it."""
+    ranked = sorted(tournament.competitors, key=lambda player: (-player.score, -player.elo, player.id))
+    players_with_bye = {getattr(player1 or player2, 'id', None)
+                        for tournament_round in tournament.rounds
+                        for (player1, _), (player2, _) in tournament_round.matches
+                        if player1 is None or player2 is None}
+    tournament.add_round(f"Round {len(tournament.rounds) + 1}", make_pairings(ranked, players_with_bye))
+
+    last_round = tournament.last_round
+    last_round.start_date = start.strftime(TIME_FORMAT_ROUND)
+    if not with_results:
+        return None
+
+    for player1_data, player2_data in last_round.matches:
+        player1, player2 = player1_data[0], player2_data[0]
+        if player1 is None or player2 is None:
+            continue
+        player1.add_opponent(player2)
+        player2.add_opponent(player1)
+        player1_data[1], player2_data[1] = play_match(player1.elo, player2.elo, rng)
+        player1.score += player1_data[1]
+        player2.score += player2_data[1]
+    last_round.end_date = (start + timedelta(hours=2)).strftime(TIME_FORMAT_ROUND)
+
+
+def play_match(elo1: int, elo2: int, rng: random.Random) -> tuple:
+    """Draw the scores of a match from the Elo expected score of the first player."""
+    expected = 1 / (1 + 10 ** ((elo2 - elo1) / 400))
+    draw = DRAW_RATE * (1 - abs(2 * expected - 1))
+    outcome = rng.random()
+    if outcome < draw:
+        return 0.5, 0.5
+    return (1, 0) if outcome < draw + expected * (1 - draw) else (0, 1)
+
+
+def populate_database(db_path: str, backend: Backend = Backend.TINYDB, number_of_players: int = DEFAULT_PLAYERS,
+                      number_of_tournaments: int = DEFAULT_TOURNAMENTS, number_of_rounds: int = DEFAULT_ROUNDS,
+                      competitors: int = DEFAULT_COMPETITORS, seed: int = SEED) -> None:
+    """Create the database at 'db_path' and fill it with finished tournaments, one every two weeks."""
+    rng = random.Random(seed)
+    if create_database(Path(db_path), backend):
+        raise RuntimeError(f"Failed to create database '{db_path}'.")
+
+    players_registry = PlayersRegistry(db_path, backend)
+    players = generate_players(number_of_players, rng)
+    players_registry.add_many(players)
+
+    tournaments_registry = TournamentsRegistry(db_path, backend=backend)
+    for idx in range(number_of_tournaments):
+        field = rng.sample(players, min(competitors, len(players)))
+        tournaments_registry.add(generate_tournament(field, number_of_rounds, rng,
+                                                     start_date=FIRST_DATE + timedelta(weeks=2 * idx)))
+    tournaments_registry.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic chesstournament database.")
+    parser.add_argument('db_path')
+    parser.add_argument('--players', type=int, default=DEFAULT_PLAYERS)
+    parser.add_argument('--tournaments', type=int, default=DEFAULT_TOURNAMENTS)
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--competitors', type=int, default=DEFAULT_COMPETITORS)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--backend', choices=[backend.value for backend in Backend], default=Backend.TINYDB.value)
+    args = parser.parse_args()
+    args.backend = Backend(args.backend)
+
+    populate_database(args.db_path, args.backend, args.players, args.tournaments, args.rounds, args.competitors,
+                      args.seed)
+    print(f"{args.players} players and {args.tournaments} tournaments written to '{args.db_path}'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Measure the memory used by the models when loading a large player base.
+
+Usage: python -m benchmarks.memory [NUMBER_OF_PLAYERS]
+
+Each model is compared with the same attributes held in a per-instance __dict__, as the models did before
+they declared __slots__.
+"""
+
+import random
+import sys
+import tracemalloc
+
+from chesstournament.models.player import Player, TournamentPlayer
+
+DEFAULT_NUMBER_OF_PLAYERS = 100000
+SEED = 42
+
+
+class DictModel:
+    """Hold the attributes of a model with __slots__ in a __dict__ instead."""
+
+    def __init__(self, model) -> None:
+        for klass in type(model).__mro__:
+            for name in getattr(klass, '__slots__', ()):
+                setattr(self, name, getattr(model, name))
+
+
+def generate_documents(number_of_players: int) -> list:
+    """Create players documents as returned by the storage."""
+    rng = random.Random(SEED)
+    return [{'first_name': f"first{idx}", 'last_name': f"last{idx}", 'birth_date': '1990-01-01',
+             'sex': rng.choice('mf'), 'elo': rng.randint(1000, 2800), 'id': idx}
+            for idx in range(1, number_of_players + 1)]
+
+
+def measure(build, documents: list) -> int:
+    """Return the memory allocated by the objects built from 'documents', in bytes."""
+    tracemalloc.start()
+    objects = [build(document) for document in documents]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current
+
+
+def main(number_of_players: int) -> None:
+    documents = generate_documents(number_of_players)
+
+    players = [Player(**document) for document in documents]
+    sizes = {
+        'Player': (measure(lambda document: Player(**document), documents),
+                   measure(lambda document: DictModel(Player(**document)), documents)),
+        'TournamentPlayer': (measure(TournamentPlayer.from_player, players),
+                             measure(lambda player: DictModel(TournamentPlayer.from_player(player)), players))
+    }
+
+    print(f"{'model':>16} {'players':>8} {'__slots__ (MiB)':>16} {'__dict__ (MiB)':>15} {'saved':>6}")
+    for name, (slots_size, dict_size) in sizes.items():
+        print(f"{name:>16} {number_of_players:>8} {slots_size / 2 ** 20:>16.1f} {dict_size / 2 ** 20:>15.1f}"
+              f" {1 - slots_size / dict_size:>6.0%}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER_OF_PLAYERS)
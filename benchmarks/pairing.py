@@ -0,0 +1,85 @@
+"""Benchmark the pairing of a Swiss round with list and set backed opponent lookups.
+
+Usage: python -m benchmarks.pairing [SIZE ...]
+
+"before" runs the greedy pairing loop formerly used by TournamentEngine._launch_next_round with the list
+backed 'has_faced', "after" runs the same loop with the set backed 'has_faced'. "make_pairings" is the
+pairing actually used by the engine nowadays.
+"""
+
+import math
+import random
+import sys
+import timeit
+
+from chesstournament.controllers.pairing import make_pairings
+from chesstournament.models.player import TournamentPlayer
+
+DEFAULT_SIZES = (100, 1000, 10000)
+REPEAT = 3
+SEED = 42
+
+
+class ListBackedPlayer(TournamentPlayer):
+    """A TournamentPlayer looking up its opponents in the ordered list, as it used to."""
+
+    def has_faced(self, other_player):
+        return other_player.id in self.previous_opponents
+
+
+def generate_field(size: int, player_class=TournamentPlayer) -> list:
+    """Create 'size' ranked players with a plausible history of log2(size) rounds."""
+    rng = random.Random(SEED)
+    players = [player_class(idx, 'first', 'last', '1990-01-01', 'm', rng.randint(1000, 2800))
+               for idx in range(1, size + 1)]
+
+    for _ in range(max(1, int(math.log2(size)))):
+        players.sort(key=lambda p: (p.score, p.elo), reverse=True)
+        for player_a, player_b in make_pairings(players):
+            if player_b is None:
+                player_a.wins()
+                continue
+            player_a.add_opponent(player_b)
+            player_b.add_opponent(player_a)
+            rng.choice((player_a.wins, player_b.wins))()
+
+    players.sort(key=lambda p: (p.score, p.elo), reverse=True)
+    return players
+
+
+def greedy_pairing(players: list) -> list:
+    """The former pairing loop, only with a set of busy players."""
+    busy_players = set()
+    fixtures = []
+    for ida, player_a in enumerate(players[:-1]):
+        if player_a.id in busy_players:
+            continue
+        for idb in range(ida + 1, len(players)):
+            player_b = players[idb]
+            if player_b.id in busy_players:
+                continue
+            if not player_a.has_faced(player_b):
+                fixtures.append((player_a, player_b))
+                busy_players.update((player_a.id, player_b.id))
+                break
+    return fixtures
+
+
+def best_time(statement) -> float:
+    return min(timeit.repeat(statement, number=1, repeat=REPEAT))
+
+
+def main(sizes) -> None:
+    print(f"{'players':>8} {'before (s)':>12} {'after (s)':>12} {'make_pairings (s)':>18}")
+    for size in sizes:
+        list_players = generate_field(size, ListBackedPlayer)
+        set_players = generate_field(size)
+
+        before = best_time(lambda: greedy_pairing(list_players))
+        after = best_time(lambda: greedy_pairing(set_players))
+        engine = best_time(lambda: make_pairings(set_players))
+        print(f"{size:>8} {before:>12.4f} {after:>12.4f} {engine:>18.4f}")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,196 @@
+"""Play whole Swiss tournaments from scripted scenarios and report the latency of the engine operations.
+
+Usage: python -m benchmarks.replay [SIZE ...] [--rounds K] [--backend {tinydb,sqlite}] [--seed SEED]
+                                   [--scenarios DIR] [--output FILE] [--write-behind] [--no-flush-on-round]
+
+For every size (50, 500 and 5000 players by default), a database is generated with the
+players registered in a new tournament, and a scenario is written with the answers an arbiter would give to
+'chesstournament run': launch the tournament, then for every round enter the result of each board and mark
+the round as finished. The scenario is replayed through the same input source as 'run --scenario', the
+output of the app is discarded. The latencies of result entry, round finishing (which includes the pairing
+of the next round) and pairing are reported as p50/p95/p99, in milliseconds.
+
+With '--scenarios', the scenarios and databases are kept in DIR so they can be replayed with the CLI.
+With '--write-behind', the tournament is written by a background thread as 'run' does by default.
+
+After each replay the database is closed, as on exit, and the tournament is loaded back: the script fails
+when the stored competitors differ from those of the replayed tournament. Odd sizes give byes, run e.g.
+'python -m benchmarks.replay 51 --write-behind --no-flush-on-round' to check the results journals.
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.generator import SEED, generate_players
+from chesstournament import view
+from chesstournament.controllers.tournament_engine import TournamentEngine, COMPETITOR_MENU_LAUNCH, \
+    MAIN_MENU_CURRENT_ROUND, MATCH_MENU_BACK, MATCH_MENU_DRAW, MATCH_MENU_P1_WINS, MATCH_MENU_P2_WINS, \
+    ROUND_MENU_BACK
+from chesstournament.models import session
+from chesstournament.models.database import PlayersRegistry, TournamentsRegistry, create_database
+from chesstournament.models.player import TournamentPlayer
+from chesstournament.models.storage import Backend
+from chesstournament.models.tournament import Tournament
+from chesstournament.views.scenario import ScenarioEnd, ScenarioInput
+
+DEFAULT_SIZES = (50, 500, 5000)
+DEFAULT_ROUNDS = 7
+PERCENTILES = (50, 95, 99)
+
+ROUND_MENU_FINISH_LABEL = "Mark as finished (irreversible)"
+OUTCOMES = (MATCH_MENU_P1_WINS, MATCH_MENU_P2_WINS, MATCH_MENU_DRAW)
+OUTCOME_WEIGHTS = (0.4, 0.35, 0.25)
+
+
+class TimedEngine(TournamentEngine):
+    """The tournament engine, recording how long its operations take."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+
+    def _update_match_outcome(self, match, outcome):
+        start = time.perf_counter()
+        super()._update_match_outcome(match, outcome)
+        self.latencies['result_entry'].append(time.perf_counter() - start)
+
+    def _finish_round(self, current_round):
+        start = time.perf_counter()
+        super()._finish_round(current_round)
+        self.latencies['round_finish'].append(time.perf_counter() - start)
+
+    def _launch_next_round(self):
+        if self.tournament.is_over:
+            return super()._launch_next_round()
+        start = time.perf_counter()
+        super()._launch_next_round()
+        self.latencies['pairing'].append(time.perf_counter() - start)
+
+
+def write_scenario(number_of_players: int, number_of_rounds: int, rng: random.Random) -> list:
+    """The answers to launch a tournament of 'number_of_players' and play all its rounds (see TimedEngine)."""
+    # Launch, keep the default name of the first round.
+    answers = [COMPETITOR_MENU_LAUNCH, None]
+    for round_number in range(1, number_of_rounds + 1):
+        answers.append(MAIN_MENU_CURRENT_ROUND)
+        for board in range(1, number_of_players // 2 + 1):
+            answers += [ROUND_MENU_BACK + board, rng.choices(OUTCOMES, OUTCOME_WEIGHTS)[0], MATCH_MENU_BACK]
+        answers.append(ROUND_MENU_FINISH_LABEL)
+        if round_number < number_of_rounds:
+            answers.append(None)
+    return answers
+
+
+def prepare_database(db_path: str, backend: Backend, number_of_players: int, number_of_rounds: int,
+                     rng: random.Random) -> int:
+    """Create a database with the players registered in a tournament that has not started, return its id."""
+    if create_database(Path(db_path), backend):
+        raise RuntimeError(f"Failed to create database '{db_path}'.")
+    players = generate_players(number_of_players, rng)
+    PlayersRegistry(db_path, backend).add_many(players)
+
+    tournament = Tournament(f"Replay {number_of_players}", 'Paris', number_of_rounds, 'rapid', 'A replayed event.',
+                            competitors=[TournamentPlayer.from_player(player) for player in players])
+    tournament_id = TournamentsRegistry(db_path, backend=backend).add(tournament)
+    session.close()
+    return tournament_id
+
+
+def replay(db_path: str, backend: Backend, tournament_id: int, answers: list, write_behind: bool = False,
+           flush_on_round: bool = True) -> Dict[str, List[float]]:
+    """Replay a scenario on a tournament as 'chesstournament run --scenario' does, return the latencies."""
+    session.configure(write_behind=write_behind)
+    players_registry = PlayersRegistry(db_path, backend)
+    tournaments_registry = TournamentsRegistry(db_path, backend=backend)
+    engine = TimedEngine(tournaments_registry.get_by_id(tournament_id), players_registry, tournaments_registry,
+                         flush_on_round)
+
+    view.set_input_source(ScenarioInput(answers))
+    try:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            engine.prepare()
+    except ScenarioEnd:
+        pass
+    finally:
+        view.set_input_source(None)
+        session.close()
+
+    if not engine.tournament.is_over:
+        raise RuntimeError(f"The scenario ended before the end of '{engine.tournament.name}'.")
+    check_stored(db_path, backend, engine.tournament)
+    return engine.latencies
+
+
+def check_stored(db_path: str, backend: Backend, tournament: Tournament) -> None:
+    """Load a tournament back from the database and compare its competitors to those in memory."""
+    stored = TournamentsRegistry(db_path, backend=backend).get_by_id(tournament.id)
+    session.close()
+    expected = {competitor.id: competitor.serialize() for competitor in tournament.competitors}
+    differences = [competitor['id'] for competitor in stored.competitors if competitor != expected[competitor['id']]]
+    if differences:
+        raise RuntimeError(f"The stored competitors with id={sorted(differences)} differ from the replayed ones.")
+
+
+def percentile(timings: List[float], rank: int) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(timings)
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay scripted tournaments and report operation latencies.")
+    parser.add_argument('sizes', nargs='*', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--backend', choices=[backend.value for backend in Backend], default=Backend.TINYDB.value)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--scenarios', type=Path, help="Keep the databases and scenarios in this directory.")
+    parser.add_argument('--output', type=Path, help="Save the latencies percentiles to this JSON file.")
+    parser.add_argument('--write-behind', action='store_true', help="Write the tournament in the background.")
+    parser.add_argument('--no-flush-on-round', dest='flush_on_round', action='store_false',
+                        help="Only write pending changes to disk on exit.")
+    args = parser.parse_args()
+    args.backend = Backend(args.backend)
+
+    report = {}
+    print(f"{'players':>8} {'operation':>14} {'count':>6}" + ''.join(f"{f'p{rank} (ms)':>11}" for rank in PERCENTILES))
+    with tempfile.TemporaryDirectory() as directory:
+        directory = args.scenarios or Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for size in args.sizes:
+            rng = random.Random(args.seed)
+            db_path = str(directory / f"replay-{size}.{'json' if args.backend == Backend.TINYDB else 'sqlite'}")
+            # Start afresh when the directory is reused.
+            Path(db_path).unlink(missing_ok=True)
+            shutil.rmtree(f"{db_path}.journal", ignore_errors=True)
+            tournament_id = prepare_database(db_path, args.backend, size, args.rounds, rng)
+            answers = write_scenario(size, args.rounds, rng)
+            (directory / f"replay-{size}.scenario.json").write_text(json.dumps(answers))
+
+            start = time.perf_counter()
+            latencies = replay(db_path, args.backend, tournament_id, answers, args.write_behind,
+                               args.flush_on_round)
+            report[size] = {'total': time.perf_counter() - start}
+            for operation in ('result_entry', 'round_finish', 'pairing'):
+                timings = latencies[operation]
+                report[size][operation] = {f'p{rank}': percentile(timings, rank) for rank in PERCENTILES}
+                report[size][operation]['count'] = len(timings)
+                print(f"{size:>8} {operation:>14} {len(timings):>6}"
+                      + ''.join(f"{percentile(timings, rank) * 1000:>11.2f}" for rank in PERCENTILES))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Results saved to '{args.output}'.")
+
+
+if __name__ == '__main__':
+    main()
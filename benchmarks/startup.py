@@ -0,0 +1,62 @@
+"""Check the import time of the CLI against a budget, with 'python -X importtime'.
+
+Usage: python -m benchmarks.startup [BUDGET_MS]
+
+Every command below is run REPEAT times in a fresh interpreter, its best total import time is compared to the
+budget and the modules it must not import are looked for. Exits with status 1 when a check fails, so it can
+guard the startup time in CI.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_BUDGET_MS = 200
+REPEAT = 5
+
+# Command line arguments: modules they must not import.
+COMMANDS = {
+    ('--version',): ('numpy', 'tinydb', 'sqlite3', 'chesstournament.controllers.players',
+                     'chesstournament.controllers.tournament_engine'),
+    ('--help',): ('numpy', 'tinydb', 'sqlite3', 'chesstournament.controllers.players',
+                  'chesstournament.controllers.tournament_engine'),
+    ('players', 'list'): ('numpy', 'chesstournament.controllers.tournament_engine'),
+    ('tournaments', 'list'): ('numpy', 'chesstournament.controllers.tournament_engine')
+}
+
+
+def import_times(arguments: tuple, home: str) -> dict:
+    """Return the cumulative import time of the top level modules imported by a command, in microseconds."""
+    env = dict(os.environ, HOME=home, XDG_CONFIG_HOME=home)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'chesstournament', *arguments],
+                             env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented, their time is already part of their parent's.
+        times[name.strip()] = (int(cumulative), not name[1:].startswith(' '))
+    return times
+
+
+def main(budget_ms: int) -> None:
+    failures = 0
+    print(f"{'command':>20} {'import time (ms)':>17}  unexpected imports")
+    with tempfile.TemporaryDirectory() as home:
+        for arguments, forbidden in COMMANDS.items():
+            runs = [import_times(arguments, home) for _ in range(REPEAT)]
+            total_ms = min(sum(cumulative for cumulative, top in run.values() if top) for run in runs) / 1000
+            unexpected = [module for module in forbidden if module in runs[0]]
+            print(f"{' '.join(arguments):>20} {total_ms:>17.1f}  {', '.join(unexpected) or '-'}")
+            if total_ms > budget_ms or unexpected:
+                failures += 1
+
+    if failures:
+        print(f"{failures} command(s) over the {budget_ms} ms budget or importing unexpected modules.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS)
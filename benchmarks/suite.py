@@ -0,0 +1,289 @@
+"""Run the benchmark suite over a generated database and save the timings as JSON.
+
+Usage: python -m benchmarks.suite [--players N] [--tournaments M] [--rounds K] [--competitors C] [--field F]
+                                  [--backend {tinydb,sqlite}] [--repeat R] [--seed SEED] [--only NAME ...]
+                                  [--output FILE] [--compare BASELINE] [--tolerance RATIO]
+
+The database is generated with benchmarks.generator, so runs with the same arguments are comparable. Every
+benchmark prepares its state untimed, then the measured step runs REPEAT times, the best and median timings
+are kept. With '--compare', the best timings are compared to those of a previous run and the script exits
+with status 1 when one got slower than the tolerance allows.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from typer.testing import CliRunner
+
+from benchmarks.generator import DEFAULT_COMPETITORS, DEFAULT_PLAYERS, DEFAULT_ROUNDS, DEFAULT_TOURNAMENTS, SEED, \
+    generate_tournament, play_match, populate_database
+from chesstournament import config
+from chesstournament.controllers.main import app
+from chesstournament.controllers.tournament_engine import TournamentEngine, MATCH_MENU_DRAW, MATCH_MENU_P1_WINS, \
+    MATCH_MENU_P2_WINS
+from chesstournament.models import session
+from chesstournament.models.database import PlayersRegistry, TournamentsRegistry
+from chesstournament.models.storage import Backend
+
+DEFAULT_FIELD = 1000
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.2
+
+OUTCOMES = {(1, 0): MATCH_MENU_P1_WINS, (0, 1): MATCH_MENU_P2_WINS, (0.5, 0.5): MATCH_MENU_DRAW}
+
+# Benchmark name: function returning the (setup, step) pair to measure, 'step' gets what 'setup' returns.
+BENCHMARKS: Dict[str, Callable[['Context'], Tuple[Callable, Callable]]] = {}
+
+
+def benchmark(name: str):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+class BenchmarkEngine(TournamentEngine):
+    """The tournament engine, naming the new rounds instead of prompting for their name."""
+
+    def _prompt_new_round(self):
+        return f"Round {len(self.tournament.rounds) + 1}"
+
+
+class Context:
+    """The generated database and the parameters of the run."""
+
+    def __init__(self, db_path: str, backend: Backend, args: argparse.Namespace) -> None:
+        self.db_path = db_path
+        self.backend = backend
+        self.args = args
+        self._field = PlayersRegistry(db_path, backend).get_all()[:args.field]
+        self._runs = 0
+
+    def new_engine(self, last_round_results: bool = True) -> BenchmarkEngine:
+        """Add a tournament of 'field' competitors and return an engine running it.
+
+        Either all its rounds but the last one are played, or all its rounds are paired and the last one is
+        waiting for its results ('last_round_results' False).
+
+        The tournament is saved then loaded back from the database, as 'run' would. The registries are opened
+        anew since 'db_load' closes the database session.
+        """
+        self._runs += 1
+        rng = random.Random(self.args.seed + self._runs)
+        rounds = self.args.rounds
+        tournament = generate_tournament(self._field, rounds, rng,
+                                         rounds_played=rounds if not last_round_results else rounds - 1,
+                                         last_round_results=last_round_results)
+        players_registry = PlayersRegistry(self.db_path, self.backend)
+        tournaments_registry = TournamentsRegistry(self.db_path, backend=self.backend)
+        tournaments_registry.add(tournament)
+        return BenchmarkEngine(tournaments_registry.get_by_id(tournament.id), players_registry, tournaments_registry)
+
+
+@benchmark('db_load')
+def db_load(context: Context):
+    def setup():
+        session.close()
+
+    def step(_):
+        PlayersRegistry(context.db_path, context.backend).get_all()
+        TournamentsRegistry(context.db_path, backend=context.backend).get_all()
+    return setup, step
+
+
+@benchmark('players_list')
+def players_list(context: Context):
+    return _cli_benchmark(['--output', 'jsonl', 'players', 'list', '--sort', 'elo'])
+
+
+@benchmark('tournaments_list')
+def tournaments_list(context: Context):
+    return _cli_benchmark(['--output', 'jsonl', 'tournaments', 'list', '--sort', 'recent'])
+
+
+@benchmark('hydrate_competitors')
+def hydrate_competitors(context: Context):
+    return context.new_engine, lambda engine: engine._populate_competitors()
+
+
+@benchmark('hydrate_rounds')
+def hydrate_rounds(context: Context):
+    def setup():
+        engine = context.new_engine()
+        engine._populate_competitors()
+        return engine
+    return setup, lambda engine: engine._populate_rounds()
+
+
+@benchmark('launch_next_round')
+def launch_next_round(context: Context):
+    def setup():
+        engine = context.new_engine()
+        engine._populate_rounds()
+        engine.tournament.last_round.finish()
+        return engine
+    return setup, lambda engine: engine._launch_next_round()
+
+
+@benchmark('record_results')
+def record_results(context: Context):
+    def setup():
+        engine = context.new_engine(last_round_results=False)
+        engine._populate_rounds()
+        return engine, _round_results(engine, context.args.seed)
+    return setup, lambda state: state[0].record_results(state[1])
+
+
+@benchmark('record_results_journal')
+def record_results_journal(context: Context):
+    def setup():
+        engine = context.new_engine(last_round_results=False)
+        engine._populate_rounds()
+        return engine, _round_results(engine, context.args.seed)
+
+    def step(state):
+        engine, results = state
+        for board, outcome, _ in results:
+            engine._update_match_outcome(engine.tournament.last_round.matches[board - 1], outcome)
+    return setup, step
+
+
+@benchmark('scoreboard_sort')
+def scoreboard_sort(context: Context):
+    def setup():
+        engine = context.new_engine()
+        engine._populate_rounds()
+        return engine
+    return setup, lambda engine: engine._sort_competitors()
+
+
+def _cli_benchmark(arguments: List[str]):
+    runner = CliRunner()
+
+    def step(_):
+        result = runner.invoke(app, arguments)
+        if result.exit_code:
+            raise RuntimeError(f"'{' '.join(arguments)}' failed:\n{result.output}")
+    return lambda: None, step
+
+
+def _round_results(engine: TournamentEngine, seed: int) -> list:
+    """Results for every board of the current round but the bye, as the results import command reads them."""
+    rng = random.Random(seed)
+    results = []
+    for board, ((player1, _), (player2, _)) in enumerate(engine.tournament.last_round.matches, start=1):
+        if player1 is not None and player2 is not None:
+            results.append((board, OUTCOMES[play_match(player1.elo, player2.elo, rng)], None))
+    return results
+
+
+def measure(setup: Callable, step: Callable, repeat: int) -> List[float]:
+    """Time 'step' 'repeat' times, each time on a fresh state, with the garbage collector off as timeit does."""
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            step(state)
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return timings
+
+
+def run(args: argparse.Namespace) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / ('db.json' if args.backend == Backend.TINYDB else 'db.sqlite'))
+        populate_database(db_path, args.backend, args.players, args.tournaments, args.rounds, args.competitors,
+                          args.seed)
+
+        # The listing commands read the database from the configuration.
+        config.CONFIG_DIR_PATH = Path(directory) / 'config'
+        config.CONFIG_FILE_PATH = config.CONFIG_DIR_PATH / 'config.ini'
+        config.init_app(db_path, args.backend.value)
+
+        context = Context(db_path, args.backend, args)
+        for name in args.only or BENCHMARKS:
+            timings = measure(*BENCHMARKS[name](context), args.repeat)
+            results[name] = {'best': min(timings), 'median': statistics.median(timings), 'timings': timings}
+            print(f"{name:>24} {min(timings) * 1000:>10.2f} ms {statistics.median(timings) * 1000:>10.2f} ms")
+        session.close()
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'players': args.players, 'tournaments': args.tournaments, 'rounds': args.rounds,
+                       'competitors': args.competitors, 'field': args.field, 'backend': args.backend.value,
+                       'repeat': args.repeat, 'seed': args.seed},
+        'results': results
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Return the benchmarks whose best timing got slower than the baseline's by more than 'tolerance'."""
+    if report['parameters'] != baseline['parameters']:
+        print("Warning: the baseline was run with different parameters, timings may not be comparable.")
+
+    regressions = []
+    print(f"{'benchmark':>24} {'baseline':>13} {'current':>13} {'ratio':>7}")
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        before, after = baseline['results'][name]['best'], result['best']
+        ratio = after / before if before else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:>24} {before * 1000:>10.2f} ms {after * 1000:>10.2f} ms {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the chesstournament benchmark suite.")
+    parser.add_argument('--players', type=int, default=DEFAULT_PLAYERS)
+    parser.add_argument('--tournaments', type=int, default=DEFAULT_TOURNAMENTS)
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument('--competitors', type=int, default=DEFAULT_COMPETITORS,
+                        help="Competitors of the generated tournaments.")
+    parser.add_argument('--field', type=int, default=DEFAULT_FIELD,
+                        help="Competitors of the tournaments run by the engine benchmarks.")
+    parser.add_argument('--backend', choices=[backend.value for backend in Backend], default=Backend.TINYDB.value)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Run these benchmarks only.")
+    parser.add_argument('--output', type=Path, help="Save the results to this JSON file.")
+    parser.add_argument('--compare', type=Path, help="Compare the results to those of this JSON file.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown allowed before flagging a regression, 0.2 is 20%%.")
+    args = parser.parse_args()
+    args.backend = Backend(args.backend)
+
+    report = run(args)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Results saved to '{args.output}'.")
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}.")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
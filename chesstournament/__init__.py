@@ -1,7 +1,5 @@
 """This is the top level package for chess-tournament."""
 
-from chesstournament.views.cli import CLIView
-
 __app_name__ = "chesstournament"
 __version__ = "0.1.0"
 
@@ -20,4 +18,12 @@ ERRORS = {
     FILE_ERROR: "Config file error."
 }
 
-view = CLIView()
+
+def __getattr__(name):
+    """Build the 'view' singleton on first use, the views import Typer."""
+    global view
+    if name == 'view':
+        from chesstournament.views.cli import CLIView
+        view = CLIView()
+        return view
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
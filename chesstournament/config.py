@@ -1,6 +1,7 @@
 """This module provides the chess-tournament config functionality."""
 
 from configparser import ConfigParser
+from enum import Enum
 from pathlib import Path
 
 import typer
@@ -10,14 +11,31 @@ from chesstournament import __app_name__, DIR_ERROR, FILE_ERROR, SUCCESS
 CONFIG_DIR_PATH = Path(typer.get_app_dir(__app_name__))
 CONFIG_FILE_PATH = CONFIG_DIR_PATH / "config.ini"
 
+# The defaults of the command line options live here rather than next to the code using them, so that
+# '--version' and '--help' can show them without importing the database backends.
+DEFAULT_DB_LOCATION = Path.home() / '.chess_tournament.json'
+DEFAULT_COMPACTION_THRESHOLD = 20
+# Number of writes kept in memory before dumping the database, 1 writes through.
+DEFAULT_WRITE_CACHE_SIZE = 1
+DEFAULT_METRICS_INTERVAL = 15.0
 
-def init_app(db_path: str) -> int:
+
+class Backend(str, Enum):
+    """Available storage backends."""
+    TINYDB = 'tinydb'
+    SQLITE = 'sqlite'
+
+
+DEFAULT_BACKEND = Backend.TINYDB.value
+
+
+def init_app(db_path: str, backend: str = DEFAULT_BACKEND) -> int:
     """Initialize the application."""
     config_code = _create_config_file()
     if config_code != SUCCESS:
         return config_code
 
-    db_path_code = _set_database_path(db_path)
+    db_path_code = _set_database(db_path, backend)
     if db_path_code != SUCCESS:
         return db_path_code
 
@@ -34,6 +52,16 @@ def get_database_path() -> Path:
         raise Exception(FILE_ERROR)
 
 
+def get_database_backend() -> str:
+    """Read database backend from configuration file, config files predating backends use TinyDB."""
+    if CONFIG_FILE_PATH.exists():
+        config_parser = ConfigParser()
+        config_parser.read(CONFIG_FILE_PATH)
+        return config_parser['General'].get('backend', DEFAULT_BACKEND)
+    else:
+        raise Exception(FILE_ERROR)
+
+
 def _create_config_file() -> int:
     """Create the configuration file."""
     try:
@@ -48,10 +76,10 @@ def _create_config_file() -> int:
     return SUCCESS
 
 
-def _set_database_path(db_path: str) -> int:
-    """Set the database path in the config file."""
+def _set_database(db_path: str, backend: str) -> int:
+    """Set the database path and backend in the config file."""
     config_parser = ConfigParser()
-    config_parser['General'] = {'database': db_path}
+    config_parser['General'] = {'database': db_path, 'backend': backend}
 
     try:
         with CONFIG_FILE_PATH.open("w") as file:
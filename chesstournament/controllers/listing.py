@@ -0,0 +1,68 @@
+"""This module provides the options shared by the list commands."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import typer
+
+from chesstournament import view
+
+RANGE_SEPARATOR = '..'
+
+
+def limit_option():
+    return typer.Option(None, "--limit", min=1, help="Show at most this number of rows.")
+
+
+def offset_option():
+    return typer.Option(0, "--offset", min=0, help="Skip this number of rows first.")
+
+
+def filter_option(filters_help: str):
+    return typer.Option(None, "--filter", help=f"A KEY=VALUE filter, can be repeated. {filters_help}")
+
+
+def pager_option():
+    return typer.Option(False, "--pager", help="Show the rows through a pager.")
+
+
+def file_option():
+    return typer.Option(None, "--file", dir_okay=False, writable=True, help="Write the rows to a file.")
+
+
+@contextmanager
+def output_to(file: Optional[Path], pager: bool):
+    """Send the rows printed within the context to 'file' or to a pager, stdout by default."""
+    if file is None:
+        with view.output_to(pager=pager):
+            yield
+        return None
+
+    with file.open('w', encoding='utf-8') as output, view.output_to(output):
+        yield
+
+
+def parse_filters(filters: Optional[List[str]], keys: Tuple[str, ...]) -> Dict[str, str]:
+    """Parse KEY=VALUE filters, the keys must be one of 'keys'."""
+    parsed = {}
+    for item in filters or ():
+        key, separator, value = item.partition('=')
+        key = key.strip()
+        if not separator or key not in keys:
+            raise typer.BadParameter(f"Invalid filter '{item}', expected KEY=VALUE with KEY in {', '.join(keys)}.",
+                                     param_hint="'--filter'")
+        parsed[key] = value.strip()
+    return parsed
+
+
+def parse_range(value: str, convert: Callable) -> Tuple[Optional[object], Optional[object]]:
+    """Parse a 'MIN..MAX' range, either bound can be left out. A single value is a range of its own."""
+    low, separator, high = value.partition(RANGE_SEPARATOR)
+    if not separator:
+        high = low
+    try:
+        return (convert(low) if low else None), (convert(high) if high else None)
+    except ValueError:
+        raise typer.BadParameter(f"Invalid range '{value}', expected MIN{RANGE_SEPARATOR}MAX.",
+                                 param_hint="'--filter'")
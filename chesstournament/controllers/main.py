@@ -1,20 +1,56 @@
-"""This is the main controller of chesstournament."""
+"""This is the main controller of chesstournament.
 
+The subcommands, the models and the views are imported when a command is invoked, so that a command only
+pays for the modules it uses: '--version' and '--help' import no database backend, and the tournament engine
+and NumPy are only needed to run tournaments and rate them.
+"""
+
+import atexit
+import importlib
 from pathlib import Path
 from typing import Optional
 
+import click
 import typer
+from typer.core import TyperGroup
+from typer.models import TyperInfo
+
+from chesstournament import __app_name__, __version__, config, ERRORS
+from chesstournament.config import Backend, DEFAULT_COMPACTION_THRESHOLD, DEFAULT_DB_LOCATION, \
+    DEFAULT_METRICS_INTERVAL, DEFAULT_WRITE_CACHE_SIZE
+from chesstournament.views.utils import OutputFormat
+
+# Subcommands name: (module defining their Typer app, help).
+SUBCOMMANDS = {
+    'players': ('chesstournament.controllers.players', 'Manage players in the app.'),
+    'tournaments': ('chesstournament.controllers.tournaments', 'Manage tournaments in the app'),
+    'results': ('chesstournament.controllers.results', 'Manage match results in the app.')
+}
+
+
+class LazyGroup(TyperGroup):
+    """A group importing the module of a subcommand the first time it is looked up."""
 
-from chesstournament import __app_name__, __version__, config, ERRORS, view
-from chesstournament.controllers import players, tournaments
-from chesstournament.controllers.tournament_engine import TournamentEngine, TournamentEngineException
-from chesstournament.models.database import DEFAULT_DB_LOCATION, DatabaseException, create_database
-from chesstournament.models.player import PlayerException
-from chesstournament.models.tournament import TournamentException
+    def list_commands(self, ctx: click.Context):
+        return sorted(set(super().list_commands(ctx)) | set(SUBCOMMANDS))
 
-app = typer.Typer(add_completion=False)
-app.add_typer(players.app, name='players', help='Manage players in the app.')
-app.add_typer(tournaments.app, name='tournaments', help='Manage tournaments in the app')
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name in SUBCOMMANDS and cmd_name not in self.commands:
+            module_name, help_text = SUBCOMMANDS[cmd_name]
+            # Same as app.add_typer(module.app, name=cmd_name, help=help_text).
+            sub_app = importlib.import_module(module_name).app
+            self.add_command(typer.main.get_group_from_info(TyperInfo(sub_app, name=cmd_name, help=help_text)))
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter):
+        """List the commands in the help, without importing the subcommands to read their help."""
+        rows = [(name, SUBCOMMANDS[name][1] if name in SUBCOMMANDS else self.commands[name].get_short_help_str())
+                for name in self.list_commands(ctx)]
+        with formatter.section("Commands"):
+            formatter.write_dl(rows)
+
+
+app = typer.Typer(add_completion=False, cls=LazyGroup)
 
 
 @app.command()
@@ -22,14 +58,22 @@ def init(db_path: str = typer.Option(
         str(DEFAULT_DB_LOCATION),
         "--db-path",
         "-db",
-        prompt="chesstournament database location?")):
+        prompt="chesstournament database location?"),
+        backend: Backend = typer.Option(
+            Backend.TINYDB.value,
+            "--backend",
+            "-b",
+            help="The storage backend, a JSON file (tinydb) or a SQLite database (sqlite).")):
     """Initialize chess tournament local storage."""
-    app_init_error = config.init_app(db_path)
+    from chesstournament import view
+    from chesstournament.models.database import create_database
+
+    app_init_error = config.init_app(db_path, backend.value)
     if app_init_error:
         view.print_error(f"Failed to create config file:\n'{ERRORS[app_init_error]}'")
         raise typer.Exit(1)
 
-    db_init_error = create_database(Path(db_path))
+    db_init_error = create_database(Path(db_path), backend)
     if db_init_error:
         view.print_error(f"Failed to create database file:\n'{ERRORS[db_init_error]}'", )
         raise typer.Exit(1)
@@ -37,31 +81,122 @@ def init(db_path: str = typer.Option(
         view.print_success(f"Succeed to create local storage file:\n'{db_path}'")
 
 
+@app.command()
+def migrate(source_path: str = typer.Option(
+        str(DEFAULT_DB_LOCATION),
+        "--from",
+        help="The JSON database file to import.")):
+    """Import a JSON database file into the configured local storage."""
+    from chesstournament import view
+    from chesstournament.models.database import migrate_database
+    from chesstournament.models.storage import open_storage
+
+    try:
+        db_path = config.get_database_path()
+        backend = Backend(config.get_database_backend())
+    except Exception:
+        view.print_error(f"Config file not found. Please, run '{__app_name__} init'.")
+        raise typer.Exit(1)
+
+    if Path(source_path).resolve() == db_path.resolve():
+        view.print_error("The JSON database file is already the configured local storage.")
+        raise typer.Exit(1)
+
+    try:
+        storage = open_storage(str(db_path), backend)
+    except Exception:
+        view.print_error(f"Failed to open local storage:\n'{db_path}'")
+        raise typer.Exit(1)
+
+    migration_error = migrate_database(Path(source_path), storage)
+    storage.close()
+    if migration_error:
+        view.print_error(f"Failed to import '{source_path}':\n'{ERRORS[migration_error]}'")
+        raise typer.Exit(1)
+    else:
+        view.print_success(f"Succeed to import '{source_path}' into:\n'{db_path}'")
+
+
 @app.command()
 def run(tournament_id: int = typer.Option(
         ...,
         "--tournament",
         "-t",
-        help="A tournament id.")):
-    """Run an existing tournament interactively."""
+        help="A tournament id."),
+        compact_every: int = typer.Option(
+            DEFAULT_COMPACTION_THRESHOLD,
+            "--compact-every",
+            help="Number of journaled match results before the tournament is rewritten (0 disables the journal)."),
+        flush_every: int = typer.Option(
+            DEFAULT_WRITE_CACHE_SIZE,
+            "--flush-every",
+            min=1,
+            help="Number of database writes kept in memory before writing them to disk."),
+        flush_on_round: bool = typer.Option(
+            True,
+            "--flush-on-round/--no-flush-on-round",
+            help="Write pending changes to disk whenever a new round starts."),
+        write_behind: bool = typer.Option(
+            True,
+            "--write-behind/--no-write-behind",
+            help="Write the tournament from a background thread, so that entering results never waits for the "
+                 "disk. Write errors are reported at the next step, pending writes are done before a round is "
+                 "marked as finished and on exit."),
+        scenario: Optional[Path] = typer.Option(
+            None,
+            "--scenario",
+            exists=True,
+            dir_okay=False,
+            help="Answer the prompts from a JSON array of menu choices and values, then exit.")):
+    """Run an existing tournament interactively.
+
+    Pending changes are always written to disk on exit.
+    """
+    from chesstournament import view
+    from chesstournament.controllers import players, tournaments
+    from chesstournament.controllers.tournament_engine import TournamentEngine, TournamentEngineException
+    from chesstournament.models import session
+    from chesstournament.models.database import DatabaseException
+    from chesstournament.models.player import PlayerException
+    from chesstournament.models.tournament import TournamentException
+    from chesstournament.views.scenario import ScenarioEnd, ScenarioException, ScenarioInput
+
+    session.configure(flush_every, write_behind)
     try:
-        tournament_registry = tournaments.get_tournaments_registry()
+        if scenario is not None:
+            scenario_input = ScenarioInput.from_file(scenario)
+            view.set_input_source(scenario_input)
+
+        tournament_registry = tournaments.get_tournaments_registry(compact_every)
         players_registry = players.get_players_registry()
         tournament = tournament_registry.get_by_id(tournament_id)
-        tournament_engine = TournamentEngine(tournament, players_registry, tournament_registry)
+        if tournament is None:
+            raise TournamentException(f"Tournament with id={tournament_id} not found.")
+        tournament_engine = TournamentEngine(tournament, players_registry, tournament_registry, flush_on_round)
 
         if tournament.has_started:
             tournament_engine.resume()
         else:
             tournament_engine.prepare()
 
-    except (TournamentException, PlayerException, DatabaseException, TournamentEngineException) as error:
+    except ScenarioEnd:
+        view.print_success(f"\nScenario replayed, {scenario_input.answered} answer(s) given.")
+    except (TournamentException, PlayerException, DatabaseException, TournamentEngineException,
+            ScenarioException) as error:
         view.print_error(f"\nTournament execution failed:\n{error.message}")
         raise typer.Exit(1)
 
+    # Closed here rather than on exit, so that a failure to write the pending changes is reported.
+    try:
+        session.close()
+    except Exception as error:
+        view.print_error(f"\nFailed to write the pending changes to disk:\n{error}")
+        raise typer.Exit(1)
+
 
 def version_callback(value: bool):
     if value:
+        from chesstournament import view
         view.print_raw(f"{__app_name__} version: {__version__}")
         raise typer.Exit()
     return None
@@ -76,8 +211,65 @@ def main(
             help="Show the application's version and exit.",
             callback=version_callback,
             is_eager=True
-        )):
+        ),
+        output: OutputFormat = typer.Option(
+            OutputFormat.TABLE.value,
+            "--output",
+            "-o",
+            help="Print lists, scoreboards and rounds as tables (default), JSON, JSON lines or CSV."),
+        timings: bool = typer.Option(
+            False,
+            "--timings",
+            help="Print on exit how long the command spent loading, hydrating, pairing, serializing, writing "
+                 "and rendering, with the bytes read and written (JSON databases and journals only)."),
+        profile: Optional[Path] = typer.Option(
+            None,
+            "--profile",
+            dir_okay=False,
+            help="Profile the command with cProfile and save the stats to this file (see python -m pstats)."),
+        metrics_path: Optional[Path] = typer.Option(
+            None,
+            "--metrics",
+            dir_okay=False,
+            help="Export counters and histograms of the command to this file, in the Prometheus text format."),
+        metrics_interval: float = typer.Option(
+            DEFAULT_METRICS_INTERVAL,
+            "--metrics-interval",
+            min=1.0,
+            help="Seconds between two exports of the metrics, they are also exported on exit.")):
     """
     A CLI app to manage chess tournaments.
     """
+    from chesstournament import view
+
+    view.set_output_format(output)
+    # Registered before the database session is opened, so that they run after its last flush on exit.
+    if timings:
+        from chesstournament import instrumentation
+        instrumentation.enable_timings()
+        atexit.register(_print_timings)
+    if profile is not None:
+        from chesstournament import instrumentation
+        atexit.register(instrumentation.start_profile(str(profile)))
+    if metrics_path is not None:
+        from chesstournament import metrics
+        try:
+            stop_export = metrics.export(str(metrics_path), metrics_interval)
+        except OSError as error:
+            view.print_error(f"Failed to export metrics to '{metrics_path}':\n{error}")
+            raise typer.Exit(1)
+        atexit.register(_stop_metrics_export, stop_export, metrics_path)
     return None
+
+
+def _print_timings() -> None:
+    from chesstournament import instrumentation
+    typer.echo(''.join(instrumentation.report()), err=True, nl=False)
+
+
+def _stop_metrics_export(stop_export, metrics_path: Path) -> None:
+    from chesstournament import view
+    try:
+        stop_export()
+    except OSError as error:
+        view.print_error(f"Failed to export metrics to '{metrics_path}':\n{error}")
@@ -0,0 +1,261 @@
+"""This module pairs the competitors of a Swiss-system round.
+
+Competitors are expected to be ranked by score then Elo, so that score groups are contiguous and each player
+is paired with the closest available player in the ranking: within their score group first, floating down to
+the next score groups when needed. Rematches are avoided whenever the field allows it:
+
+1. a depth-first search with backtracking finds the pairing closest to the ranking, which in practice
+   succeeds without backtracking much;
+2. should the search exceed its budget, a maximum cardinality matching (Edmonds' blossom algorithm) over
+   the "has not faced" graph tells how many pairs can avoid a rematch. Players are then paired in ranking
+   order with the closest partner keeping that many pairs possible, which is the pairing the search looks for;
+3. the players left over are paired in ranking order, these are unavoidable rematches.
+
+With an odd number of competitors, the bye goes to the lowest ranked player who has not had one yet (to the
+lowest ranked player when all of them have), before the other players are paired.
+"""
+
+from collections import deque
+from typing import Collection, List, Optional, Sequence, Tuple
+
+from chesstournament.models.player import TournamentPlayer
+
+# Backtracking steps allowed per competitor before falling back to the matching algorithm.
+SEARCH_BUDGET_PER_PLAYER = 50
+MIN_SEARCH_BUDGET = 10000
+
+Fixture = Tuple[TournamentPlayer, Optional[TournamentPlayer]]
+
+
+def make_pairings(ranked_players: Sequence[TournamentPlayer], had_bye: Collection[int] = ()) -> List[Fixture]:
+    """Pair ranked players for the next round.
+
+    Arguments:
+        ranked_players -- competitors sorted by score, then Elo (best first).
+        had_bye -- ids of the players who already had a bye.
+    """
+    players = list(ranked_players)
+    bye_fixtures = []
+    if len(players) % 2:
+        bye_fixtures.append((players.pop(_bye_index(players, had_bye)), None))
+
+    forbidden = _forbidden_partners(players)
+    partners = _search(forbidden, max(MIN_SEARCH_BUDGET, SEARCH_BUDGET_PER_PLAYER * len(players)))
+    if partners is None:
+        partners = _closest_matching(forbidden)
+        _pair_leftovers(partners)
+
+    fixtures = [(players[idx], players[partner_idx]) for idx, partner_idx in enumerate(partners) if idx < partner_idx]
+    return fixtures + bye_fixtures
+
+
+def _bye_index(players: List[TournamentPlayer], had_bye: Collection[int]) -> int:
+    """Return the index of the lowest ranked player who has not had a bye, of the lowest ranked one otherwise."""
+    had_bye = set(had_bye)
+    for idx in range(len(players) - 1, -1, -1):
+        if players[idx].id not in had_bye:
+            return idx
+    return len(players) - 1
+
+
+def _forbidden_partners(players: List[TournamentPlayer]) -> List[set]:
+    """Build, for each player index, the indexes a player cannot be paired with."""
+    indexes = {player.id: idx for idx, player in enumerate(players)}
+    forbidden = [set() for _ in players]
+    for idx, player in enumerate(players):
+        forbidden[idx].update(indexes[opponent] for opponent in player.previous_opponents if opponent in indexes)
+    return forbidden
+
+
+def _search(forbidden: List[set], budget: int) -> Optional[List[int]]:
+    """Find the rematch-free pairing closest to the ranking, by backtracking.
+
+    Returns the partner index of each player, or None when the budget is exhausted or no pairing exists.
+    """
+    size = len(forbidden)
+    partners = [-1] * size
+    choices = []
+
+    idx, candidate = 0, 1
+    for _ in range(budget):
+        while idx < size and partners[idx] != -1:
+            idx += 1
+        if idx == size:
+            return partners
+        candidate = max(candidate, idx + 1)
+
+        not_allowed = forbidden[idx]
+        while candidate < size and (partners[candidate] != -1 or candidate in not_allowed):
+            candidate += 1
+
+        if candidate < size:
+            partners[idx], partners[candidate] = candidate, idx
+            choices.append((idx, candidate))
+            idx, candidate = idx + 1, idx + 2
+        elif choices:
+            idx, candidate = choices.pop()
+            partners[idx] = partners[candidate] = -1
+            candidate += 1
+        else:
+            return None
+    return None
+
+
+def _closest_matching(forbidden: List[set]) -> List[int]:
+    """Pair each player, in ranking order, with the closest partner keeping a maximum matching possible.
+
+    Returns the partner index of each player, -1 for the players no maximum matching can pair.
+    """
+    size = len(forbidden)
+    adjacency = [[other for other in range(size) if other != idx and other not in forbidden[idx]]
+                 for idx in range(size)]
+    # A maximum matching of the players not paired yet, the paired ones are excluded from the graph.
+    match = _maximum_matching(adjacency)
+    excluded = [False] * size
+    for idx in range(size):
+        if excluded[idx]:
+            continue
+        excluded[idx] = True
+        for candidate in adjacency[idx]:
+            if not excluded[candidate]:
+                trial = _force_pair(idx, candidate, forbidden, adjacency, match, excluded)
+                if trial is not None:
+                    match = trial
+                    break
+    return match
+
+
+def _force_pair(idx: int, candidate: int, forbidden: List[set], adjacency: List[List[int]], match: List[int],
+                excluded: List[bool]) -> Optional[List[int]]:
+    """Pair 'idx' with 'candidate' and return the matching updated to stay maximum, or None if it cannot.
+
+    'idx' is already excluded, 'candidate' gets excluded when the pair is kept.
+    """
+    trial = list(match)
+    removed_pairs = 0
+    freed = []
+    for vertex in (idx, candidate):
+        partner = trial[vertex]
+        if partner != -1 and trial[partner] == vertex:
+            removed_pairs += 1
+            trial[vertex] = trial[partner] = -1
+            if partner not in (idx, candidate):
+                freed.append(partner)
+    trial[idx], trial[candidate] = candidate, idx
+    excluded[candidate] = True
+
+    # The new pair makes up for one of the removed pairs, an augmenting path from a freed player for the other.
+    # The shortest ones are looked for first: pairing the freed players together, or each with one player of a
+    # same pair.
+    if removed_pairs == 2:
+        first, second = freed
+        if second not in forbidden[first]:
+            trial[first], trial[second] = second, first
+            return trial
+        for other in adjacency[first]:
+            mate = trial[other]
+            if not excluded[other] and mate != -1 and second not in forbidden[mate]:
+                trial[first], trial[other], trial[mate], trial[second] = other, first, second, mate
+                return trial
+    for root in freed:
+        if removed_pairs <= 1:
+            break
+        if _augment(root, adjacency, trial, excluded):
+            removed_pairs -= 1
+    if removed_pairs <= 1:
+        return trial
+    excluded[candidate] = False
+    return None
+
+
+def _maximum_matching(adjacency: List[List[int]]) -> List[int]:
+    """Edmonds' blossom algorithm on the graph of allowed pairs, seeded with a greedy matching."""
+    size = len(adjacency)
+    match = [-1] * size
+    for idx in range(size):
+        if match[idx] == -1:
+            for other in adjacency[idx]:
+                if match[other] == -1:
+                    match[idx], match[other] = other, idx
+                    break
+
+    excluded = [False] * size
+    for root in range(size):
+        if match[root] == -1:
+            _augment(root, adjacency, match, excluded)
+    return match
+
+
+def _augment(root: int, adjacency: List[List[int]], match: List[int], excluded: List[bool]) -> bool:
+    """Grow 'match' by one pair along an augmenting path from the unmatched 'root', if there is one."""
+    vertex, parents = _find_augmenting_path(root, adjacency, match, excluded)
+    if vertex == -1:
+        return False
+    while vertex != -1:
+        parent = parents[vertex]
+        next_vertex = match[parent]
+        match[vertex], match[parent] = parent, vertex
+        vertex = next_vertex
+    return True
+
+
+def _find_augmenting_path(root: int, adjacency: List[List[int]], match: List[int],
+                          excluded: List[bool]) -> Tuple[int, List[int]]:
+    size = len(adjacency)
+    used = [False] * size
+    parents = [-1] * size
+    base = list(range(size))
+
+    def lowest_common_ancestor(a, b):
+        on_path = [False] * size
+        while True:
+            a = base[a]
+            on_path[a] = True
+            if match[a] == -1:
+                break
+            a = parents[match[a]]
+        while True:
+            b = base[b]
+            if on_path[b]:
+                return b
+            b = parents[match[b]]
+
+    def mark_path(vertex, blossom_base, child, blossom):
+        while base[vertex] != blossom_base:
+            blossom[base[vertex]] = blossom[base[match[vertex]]] = True
+            parents[vertex] = child
+            child = match[vertex]
+            vertex = parents[match[vertex]]
+
+    used[root] = True
+    queue = deque([root])
+    while queue:
+        vertex = queue.popleft()
+        for other in adjacency[vertex]:
+            if excluded[other] or base[vertex] == base[other] or match[vertex] == other:
+                continue
+            if other == root or (match[other] != -1 and parents[match[other]] != -1):
+                blossom_base = lowest_common_ancestor(vertex, other)
+                blossom = [False] * size
+                mark_path(vertex, blossom_base, other, blossom)
+                mark_path(other, blossom_base, vertex, blossom)
+                for idx in range(size):
+                    if blossom[base[idx]]:
+                        base[idx] = blossom_base
+                        if not used[idx]:
+                            used[idx] = True
+                            queue.append(idx)
+            elif parents[other] == -1:
+                parents[other] = vertex
+                if match[other] == -1:
+                    return other, parents
+                used[match[other]] = True
+                queue.append(match[other])
+    return -1, parents
+
+
+def _pair_leftovers(partners: List[int]) -> None:
+    """Pair the players left unmatched in ranking order, these are unavoidable rematches."""
+    leftovers = [idx for idx, partner_idx in enumerate(partners) if partner_idx == -1]
+    for idx, partner_idx in zip(leftovers[::2], leftovers[1::2]):
+        partners[idx], partners[partner_idx] = partner_idx, idx
@@ -1,17 +1,38 @@
 """This module defines the controller to manage players."""
 
-from enum import Flag, auto
-from operator import attrgetter
-from typing import List
+import csv
+import itertools
+import json
+from enum import Enum
+from pathlib import Path
+from typing import Iterator, List, Optional, TextIO, Tuple, Union
 
 import typer
 
 from chesstournament import view, config, __app_name__
+from chesstournament.controllers import listing
 from chesstournament.models.database import PlayersRegistry, DatabaseException
+from chesstournament.models.storage import Backend
 from chesstournament.models.player import Player, PlayerException
 
 app = typer.Typer(add_completion=False)
 
+PLAYER_FIELDS = ("first_name", "last_name", "birth_date", "sex", "elo")
+RATING_CHANGE_COLUMNS = ("id", "first_name", "last_name", "old_elo", "elo", "difference")
+DEFAULT_CHUNK_SIZE = 1000
+PLAYER_FILTERS = ("name", "elo")
+
+
+class PlayerOrder(str, Enum):
+    ID = 'id'
+    NAME = 'name'
+    ELO = 'elo'
+
+
+class PlayersFormat(str, Enum):
+    CSV = 'csv'
+    JSONL = 'jsonl'
+
 
 @app.command()
 def add():
@@ -32,33 +53,45 @@ def add():
 
 @app.command("list")
 def list_players(
+        sort: PlayerOrder = typer.Option(
+            PlayerOrder.ID,
+            "--sort",
+            help="Sort the players by id, name or Elo rank (best first)."
+        ),
         sort_alpha: bool = typer.Option(
             False,
             "--sort-alpha",
-            help="Sort the players alphabetically by their last name."
+            help="Sort the players alphabetically by their last name, same as --sort name."
         ),
         sort_elo: bool = typer.Option(
             False,
             "--sort-elo",
-            help="Sort the players by their Elo rank."
-        )
+            help="Sort the players by their Elo rank, same as --sort elo."
+        ),
+        filters: Optional[List[str]] = listing.filter_option(
+            "Keys: name (last name prefix), elo (MIN..MAX)."),
+        limit: Optional[int] = listing.limit_option(),
+        offset: int = listing.offset_option(),
+        pager: bool = listing.pager_option(),
+        output_file: Optional[Path] = listing.file_option()
 ):
     """List saved players, sorted by id (default).
 
-    Combining different sorting options has undefined behavior.
+    Combining different sorting options has undefined behavior. Only the requested page of players is sorted.
     """
-    sort_flag = PlayerSort.NONE
     if sort_alpha:
-        sort_flag |= PlayerSort.ALPHA
+        sort = PlayerOrder.NAME
     if sort_elo:
-        sort_flag |= PlayerSort.ELO
+        sort = PlayerOrder.ELO
+    filters = listing.parse_filters(filters, PLAYER_FILTERS)
+    min_elo, max_elo = listing.parse_range(filters['elo'], int) if 'elo' in filters else (None, None)
 
     try:
         players_registry = get_players_registry()
 
-        saved_players = players_registry.get_all()
-        sort_players(saved_players, sort_flag)
-        view.print_players(saved_players)
+        saved_players = players_registry.query(filters.get('name'), min_elo, max_elo, sort, limit, offset)
+        with listing.output_to(output_file, pager):
+            view.print_players(saved_players)
     except (PlayerException, DatabaseException) as error:
         view.print_error(f'\nCould not retrieve saved players:\n{error.message}')
         raise typer.Exit(1)
@@ -96,29 +129,235 @@ def update(
         raise typer.Exit(1)
 
 
+@app.command("import")
+def import_players(
+        players_file: Path = typer.Argument(
+            ...,
+            exists=True,
+            dir_okay=False,
+            help="A CSV or JSON lines file with first_name, last_name, birth_date, sex and elo fields."),
+        players_format: Optional[PlayersFormat] = typer.Option(
+            None,
+            "--format",
+            help="The format of the file, guessed from its extension by default."),
+        chunk_size: int = typer.Option(
+            DEFAULT_CHUNK_SIZE,
+            "--chunk-size",
+            min=1,
+            help="Number of players written to the database at once.")):
+    """Import players from a file, invalid rows are reported and skipped."""
+    try:
+        players_format = players_format or _guess_format(players_file)
+        players_registry = get_players_registry()
+
+        nb_of_imported = nb_of_rejected = 0
+        with players_file.open(newline='', encoding='utf-8') as file:
+            valid_players = _ValidPlayers(read_players(file, players_format))
+            while True:
+                chunk = list(itertools.islice(valid_players, chunk_size))
+                if not chunk:
+                    break
+                players_registry.add_many(chunk)
+                nb_of_imported += len(chunk)
+            nb_of_rejected = valid_players.rejected
+
+        view.print_success(f"\n{nb_of_imported} player(s) imported, {nb_of_rejected} row(s) rejected.")
+    except (OSError, ValueError) as error:
+        view.print_error(f'\nCould not read {players_file}:\n{error}')
+        raise typer.Exit(1)
+    except DatabaseException as error:
+        view.print_error(f'\nPlayers import failed:\n{error.message}')
+        raise typer.Exit(1)
+
+
+@app.command("export")
+def export_players(
+        players_file: str = typer.Argument(
+            "-",
+            help="The file to write, stdout by default."),
+        players_format: PlayersFormat = typer.Option(
+            PlayersFormat.CSV.value,
+            "--format",
+            help="The format of the file.")):
+    """Export saved players to a CSV or JSON lines file."""
+    try:
+        players_registry = get_players_registry()
+        if players_file == "-":
+            write_players(typer.get_text_stream('stdout'), players_registry.iter_all(), players_format)
+        else:
+            with open(players_file, 'w', newline='', encoding='utf-8') as file:
+                write_players(file, players_registry.iter_all(), players_format)
+    except OSError as error:
+        view.print_error(f'\nCould not write {players_file}:\n{error}')
+        raise typer.Exit(1)
+    except DatabaseException as error:
+        view.print_error(f'\nCould not retrieve saved players:\n{error.message}')
+        raise typer.Exit(1)
+
+
+@app.command("sync-ratings")
+def sync_ratings(
+        ratings_file: Path = typer.Argument(
+            ...,
+            exists=True,
+            dir_okay=False,
+            help="A CSV or JSON lines rating list, players are matched by 'id', "
+                 "or by 'last_name', 'first_name' (and 'birth_date')."),
+        players_format: Optional[PlayersFormat] = typer.Option(
+            None,
+            "--format",
+            help="The format of the file, guessed from its extension by default."),
+        show_changes: bool = typer.Option(
+            False,
+            "--show-changes",
+            help="List every updated rating."),
+        dry_run: bool = typer.Option(
+            False,
+            "--dry-run",
+            help="Compute the changes without saving them.")):
+    """Update players Elo ratings from a rating list, only the changed ratings are written."""
+    try:
+        players_format = players_format or _guess_format(ratings_file)
+        players_registry = get_players_registry()
+        saved_players = {player.id: player for player in players_registry.iter_all()}
+
+        old_ratings = {}
+        nb_of_unknown = nb_of_rejected = 0
+        with ratings_file.open(newline='', encoding='utf-8') as file:
+            for line_num, row in _read_rows(file, players_format):
+                try:
+                    if isinstance(row, str):
+                        raise PlayerException(row)
+                    player = _match_rating(row, saved_players, players_registry)
+                    if player is None:
+                        nb_of_unknown += 1
+                        continue
+                    old_elo = player.elo
+                    player.elo = int(row['elo'])
+                    old_ratings.setdefault(player.id, old_elo)
+                except PlayerException as error:
+                    nb_of_rejected += 1
+                    view.print_error(f"Line {line_num}: {error.message}")
+                except (KeyError, TypeError, ValueError) as error:
+                    nb_of_rejected += 1
+                    view.print_error(f"Line {line_num}: Invalid row: {error}.")
+
+        changes = [(saved_players[player_id], old_elo) for player_id, old_elo in old_ratings.items()
+                   if saved_players[player_id].elo != old_elo]
+        if changes and not dry_run:
+            players_registry.update_many([player for player, _ in changes])
+
+        if show_changes:
+            view.print_tabular_data(
+                RATING_CHANGE_COLUMNS,
+                [dict(id=player.id, first_name=player.first_name, last_name=player.last_name, old_elo=old_elo,
+                      elo=player.elo, difference=f"{player.elo - old_elo:+d}") for player, old_elo in changes],
+                heading="Rating changes")
+        view.print_success(
+            f"\n{len(changes)} rating(s) {'to update' if dry_run else 'updated'}, "
+            f"{len(old_ratings) - len(changes)} unchanged, {nb_of_unknown} unknown player(s), "
+            f"{nb_of_rejected} row(s) rejected.")
+    except (OSError, ValueError) as error:
+        view.print_error(f'\nCould not read {ratings_file}:\n{error}')
+        raise typer.Exit(1)
+    except DatabaseException as error:
+        view.print_error(f'\nRatings synchronization failed:\n{error.message}')
+        raise typer.Exit(1)
+
+
 def get_players_registry() -> PlayersRegistry:
     """Create a PlayerRegistry instance."""
     try:
         db_path = config.get_database_path()
-        players_registry = PlayersRegistry(str(db_path))
+        backend = Backend(config.get_database_backend())
+        players_registry = PlayersRegistry(str(db_path), backend)
         return players_registry
     except Exception:
         view.print_error(f"Config file not found. Please, run '{__app_name__} init'.")
         raise typer.Exit(1)
 
 
-class PlayerSort(Flag):
-    """Sorting flags for players"""
-    NONE = 0
-    ALPHA = auto()
-    ELO = auto()
+def read_players(file: TextIO, players_format: PlayersFormat) -> Iterator[Tuple[int, Union[Player, str]]]:
+    """Stream the rows of a players file as (line number, player), or (line number, error) for invalid rows."""
+    for line_num, row in _read_rows(file, players_format):
+        if isinstance(row, str):
+            yield line_num, row
+            continue
+        try:
+            yield line_num, Player(**{field: row[field] for field in PLAYER_FIELDS[:-1]}, elo=int(row['elo']))
+        except PlayerException as error:
+            yield line_num, error.message
+        except KeyError as error:
+            yield line_num, f"Missing field {error}."
+        except (TypeError, ValueError, AttributeError) as error:
+            yield line_num, f"Invalid row: {error}."
+
+
+def write_players(file: TextIO, players: Iterator[Player], players_format: PlayersFormat) -> None:
+    """Stream players to a CSV or JSON lines file."""
+    fields = ("id",) + PLAYER_FIELDS
+    if players_format == PlayersFormat.CSV:
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        writer.writerows([player[field] for field in fields] for player in players)
+    else:
+        for player in players:
+            file.write(json.dumps({field: player[field] for field in fields}) + "\n")
+
+
+class _ValidPlayers:
+    """Iterate over the valid players of 'read_players', report and count the invalid rows."""
+
+    def __init__(self, rows: Iterator[Tuple[int, Union[Player, str]]]) -> None:
+        self._rows = rows
+        self.rejected = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Player:
+        while True:
+            line_num, player = next(self._rows)
+            if isinstance(player, Player):
+                return player
+            self.rejected += 1
+            view.print_error(f"Line {line_num}: {player}")
+
+
+def _read_rows(file: TextIO, players_format: PlayersFormat) -> Iterator[Tuple[int, Union[dict, str]]]:
+    """Stream the records of a CSV or JSON lines file as (line number, record), or (line number, error)."""
+    if players_format == PlayersFormat.CSV:
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_num, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield line_num, f"Invalid row: {error}."
+            continue
+        yield line_num, row if isinstance(row, dict) else "Invalid row: expected an object."
+
+
+def _match_rating(row: dict, saved_players: dict, players_registry: PlayersRegistry) -> Optional[Player]:
+    """Find the saved player a rating list row refers to, by id or by name."""
+    if row.get('id') not in (None, ''):
+        return saved_players.get(int(row['id']))
+
+    candidates = players_registry.search(row['last_name'], row['first_name'])
+    if row.get('birth_date'):
+        candidates = [player for player in candidates if player.birth_date == row['birth_date']]
+    return saved_players.get(candidates[0].id) if len(candidates) == 1 else None
 
 
-def sort_players(players: List[Player], flag: PlayerSort = PlayerSort.NONE) -> None:
-    """Sort players according to the specified flag. Many flags results in undefined behavior."""
-    if flag == PlayerSort.NONE:
-        return None
-    if flag == PlayerSort.ALPHA:
-        players.sort(key=attrgetter('last_name', 'first_name'))
-    if flag == PlayerSort.ELO:
-        players.sort(key=attrgetter('elo'), reverse=True)
+def _guess_format(players_file: Path) -> PlayersFormat:
+    suffix = players_file.suffix.lstrip('.').lower()
+    if suffix in ('jsonl', 'ndjson'):
+        return PlayersFormat.JSONL
+    if suffix == 'csv':
+        return PlayersFormat.CSV
+    raise ValueError(f"Unknown players format '{players_file.suffix}', use --format.")
@@ -0,0 +1,170 @@
+"""This module defines the controller to manage match results."""
+
+import csv
+import json
+import re
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import typer
+
+from chesstournament import view
+from chesstournament.controllers import players, tournaments
+from chesstournament.controllers.tournament_engine import TournamentEngine, TournamentEngineException, \
+    MATCH_MENU_P1_WINS, MATCH_MENU_P2_WINS, MATCH_MENU_DRAW
+from chesstournament.models.database import DatabaseException
+from chesstournament.models.player import PlayerException
+from chesstournament.models.tournament import TournamentException
+
+app = typer.Typer(add_completion=False)
+
+OUTCOMES = {
+    '1-0': MATCH_MENU_P1_WINS,
+    '0-1': MATCH_MENU_P2_WINS,
+    '1/2-1/2': MATCH_MENU_DRAW,
+    '0.5-0.5': MATCH_MENU_DRAW,
+    '½-½': MATCH_MENU_DRAW
+}
+
+PGN_TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+
+# A result: board number, outcome and optionally the expected (player 1, player 2) ids.
+Result = Tuple[int, int, Optional[Tuple[int, int]]]
+
+
+class ResultsFormat(str, Enum):
+    CSV = 'csv'
+    JSON = 'json'
+    PGN = 'pgn'
+
+
+class ResultsFileException(Exception):
+    """The results module raises this when a results file cannot be parsed."""
+
+    def __init__(self, message: str) -> None:
+        """
+        Args
+            message (str): description of the error
+        """
+        self.message = message
+        super().__init__(self.message)
+
+
+@app.command("import")
+def import_results(
+        tournament_id: int = typer.Option(
+            ...,
+            "--tournament",
+            "-t",
+            help="A tournament id."),
+        results_file: Path = typer.Argument(
+            ...,
+            exists=True,
+            dir_okay=False,
+            help="A CSV, JSON or PGN file with the results of the current round."),
+        results_format: Optional[ResultsFormat] = typer.Option(
+            None,
+            "--format",
+            help="The format of the file, guessed from its extension by default.")):
+    """Record the results of the current round of a tournament from a file.
+
+    CSV and JSON records have a 'board' (1-based, as listed in the round) and a 'result' (1-0, 0-1 or
+    1/2-1/2), and optionally 'player_1' and 'player_2' ids which are checked against the round.
+    PGN games need a 'Board' tag, or a 'Round' tag like "3.12" for board 12, and a 'Result' tag.
+    """
+    try:
+        results = read_results(results_file, results_format)
+
+        tournament_registry = tournaments.get_tournaments_registry()
+        players_registry = players.get_players_registry()
+        tournament = tournament_registry.get_by_id(tournament_id)
+        if tournament is None:
+            raise TournamentException(f"Tournament with id={tournament_id} not found.")
+        tournament_engine = TournamentEngine(tournament, players_registry, tournament_registry)
+
+        nb_of_results = tournament_engine.record_results(results)
+        view.print_success(f"\n{nb_of_results} result(s) recorded for {tournament.last_round.name}.")
+    except (ResultsFileException, TournamentException, PlayerException, DatabaseException,
+            TournamentEngineException) as error:
+        view.print_error(f"\nResults were not recorded:\n{error.message}")
+        raise typer.Exit(1)
+
+
+def read_results(results_file: Path, results_format: Optional[ResultsFormat] = None) -> List[Result]:
+    """Parse a results file."""
+    if results_format is None:
+        try:
+            results_format = ResultsFormat(results_file.suffix.lstrip('.').lower())
+        except ValueError:
+            raise ResultsFileException(f"Unknown results format '{results_file.suffix}', use --format.")
+
+    try:
+        with results_file.open(newline='', encoding='utf-8') as file:
+            if results_format == ResultsFormat.CSV:
+                records = list(csv.DictReader(file))
+            elif results_format == ResultsFormat.JSON:
+                records = json.load(file)
+            else:
+                records = _read_pgn_tags(file)
+    except (OSError, ValueError) as error:
+        raise ResultsFileException(f"Could not read {results_file}: {error}")
+
+    if not isinstance(records, list):
+        raise ResultsFileException("A JSON results file must contain a list of records.")
+    return [_parse_record(idx, record) for idx, record in enumerate(records, start=1)]
+
+
+def _read_pgn_tags(lines) -> List[dict]:
+    """Read the tag pairs of each game of a PGN file, move text is ignored.
+
+    A game starts with the first tag pair after a blank line or the move text of the previous game, or with a
+    tag repeated within a tag section.
+    """
+    games = []
+    tags = {}
+    in_tag_section = False
+    for line in lines:
+        match = PGN_TAG_PATTERN.match(line.strip())
+        if match is None:
+            in_tag_section = False
+            continue
+        name, value = match.groups()
+        if tags and (not in_tag_section or name in tags):
+            games.append(tags)
+            tags = {}
+        in_tag_section = True
+        tags[name] = value
+    if tags:
+        games.append(tags)
+
+    records = []
+    for tags in games:
+        board = tags.get('Board')
+        if board is None and '.' in tags.get('Round', ''):
+            board = tags['Round'].split('.')[-1]
+        records.append({'board': board, 'result': tags.get('Result')})
+    return records
+
+
+def _parse_record(idx: int, record: dict) -> Result:
+    if not isinstance(record, dict):
+        raise ResultsFileException(f"Record {idx}: expected an object with a board and a result.")
+
+    try:
+        board = int(record.get('board'))
+    except (TypeError, ValueError):
+        raise ResultsFileException(f"Record {idx}: invalid board number {record.get('board')!r}.")
+
+    result = str(record.get('result', '')).replace(' ', '')
+    if result not in OUTCOMES:
+        raise ResultsFileException(f"Record {idx}: invalid result {record.get('result')!r} for board {board}.")
+
+    player_ids = None
+    if record.get('player_1') not in (None, '') or record.get('player_2') not in (None, ''):
+        try:
+            player_ids = (int(record.get('player_1')), int(record.get('player_2')))
+        except (TypeError, ValueError):
+            raise ResultsFileException(f"Record {idx}: invalid player ids for board {board}.")
+
+    return board, OUTCOMES[result], player_ids
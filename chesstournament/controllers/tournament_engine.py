@@ -1,16 +1,17 @@
 """This module contains the logic to run a tournament."""
 
 import itertools
-from operator import attrgetter
-
-from chesstournament import view
+from chesstournament import instrumentation, view
+from chesstournament.controllers.pairing import make_pairings
+from chesstournament.models.rating import rate_tournament
+from chesstournament.models.tiebreaks import Tiebreaks, TIEBREAKS
 from chesstournament.models.player import TournamentPlayer
 from chesstournament.models.tournament import Round
 
 # Data headers.
 COMPETITOR_HEADER = (
     "id", "first_name", "last_name", "elo", 'score'
-)
+) + TIEBREAKS
 
 MATCH_HISTORY_HEADER = ("round_name", "player_1", "player_2", "outcome")
 
@@ -55,12 +56,15 @@ class TournamentEngineException(Exception):
 class TournamentEngine:
     """This gathers the required functionality by the run tournament command."""
 
-    ROUND_MENU_FINISH = 99
+    # Key of the "Mark as finished" option of the round menu, after the matches keys, None when not offered.
+    ROUND_MENU_FINISH = None
 
-    def __init__(self, tournament, players_registry, tournament_registry):
+    def __init__(self, tournament, players_registry, tournament_registry, flush_on_round: bool = True):
         self.tournament = tournament
         self.players_registry = players_registry
         self.tournament_registry = tournament_registry
+        self.flush_on_round = flush_on_round
+        self._tiebreaks = None
 
     # Public methods.
     def prepare(self):
@@ -102,9 +106,7 @@ class TournamentEngine:
                     if round_menu_item == ROUND_MENU_BACK:
                         break
                     elif round_menu_item == self.ROUND_MENU_FINISH:
-                        current_round.finish()
-                        self._save_tournament()
-                        self._launch_next_round()
+                        self._finish_round(current_round)
                         break
                     else:
                         # Match menu.
@@ -122,19 +124,72 @@ class TournamentEngine:
                             elif match_menu_item == MATCH_MENU_DRAW:
                                 self._update_match_outcome(current_match, MATCH_MENU_DRAW)
 
+    def record_results(self, results) -> int:
+        """Record a batch of results for the current round, all of them or none, and save the tournament once.
+
+        Arguments:
+            results -- a list of (board, outcome, player_ids) where board is the 1-based index of the match in
+                       the round, outcome one of MATCH_MENU_P1_WINS, MATCH_MENU_P2_WINS, MATCH_MENU_DRAW and
+                       player_ids the expected (player 1, player 2) ids, or None to skip the check.
+        """
+        if not self.tournament.has_started:
+            raise TournamentEngineException("This tournament has not started yet.")
+        if not self._has_populated_competitors():
+            self._populate_competitors()
+        if not self._has_populated_rounds():
+            self._populate_rounds()
+
+        current_round = self.tournament.last_round
+        if current_round.is_finished:
+            raise TournamentEngineException(f"{current_round.name} is already finished.")
+
+        errors = []
+        boards = set()
+        for board, outcome, player_ids in results:
+            if board in boards:
+                errors.append(f"Board {board}: duplicate result.")
+                continue
+            boards.add(board)
+
+            if not 1 <= board <= len(current_round.matches):
+                errors.append(f"Board {board}: there are {len(current_round.matches)} boards in {current_round.name}.")
+                continue
+            (player1, _), (player2, _) = current_round.matches[board - 1]
+            if player1 is None or player2 is None:
+                errors.append(f"Board {board}: this is a bye, its result cannot be changed.")
+            elif player_ids is not None and tuple(player_ids) != (player1.id, player2.id):
+                errors.append(f"Board {board}: expected players {player1.id} vs {player2.id}, "
+                              f"got {player_ids[0]} vs {player_ids[1]}.")
+            if outcome not in (MATCH_MENU_P1_WINS, MATCH_MENU_P2_WINS, MATCH_MENU_DRAW):
+                errors.append(f"Board {board}: invalid match outcome.")
+
+        if errors:
+            raise TournamentEngineException("Invalid results, none were recorded:\n" + "\n".join(errors))
+
+        for board, outcome, _ in results:
+            self._apply_match_outcome(current_round.matches[board - 1], outcome)
+        self._save_tournament()
+        return len(results)
+
     # Private methods
     def _has_populated_competitors(self) -> bool:
         """Checks whether it should populate competitors or not."""
         return self.tournament.has_competitors and isinstance(self.tournament.competitors[0], TournamentPlayer)
 
+    @instrumentation.phase('hydrate')
     def _populate_competitors(self) -> None:
         """Populate competitors with data from the players table."""
+        lean_players = self.tournament.competitors
+        fat_players = self.players_registry.find_many([lean_player['id'] for lean_player in lean_players])
+
         t_players = []
-        for lean_player in self.tournament.competitors:
-            fat_player = self.players_registry.find(lean_player['id'])
+        for lean_player, fat_player in zip(lean_players, fat_players):
+            if fat_player is None:
+                raise TournamentEngineException(f"Competitor with id={lean_player['id']} not found.")
             t_players.append(TournamentPlayer(**fat_player, score=lean_player['score'],
                                               previous_opponents=lean_player['previous_opponents']))
         self.tournament.competitors = t_players
+        self._tiebreaks = None
 
     def _add_new_competitor(self) -> None:
         """Prompts the user to add a competitor, add it to the current tournament and save it."""
@@ -143,8 +198,7 @@ class TournamentEngine:
 
         if menu_item == COMPETITOR_MENU_ID:
             player_id = view.prompt_value("Player's id", int)
-            competitor_ids = [comp.id for comp in self.tournament.competitors]
-            if player_id in competitor_ids:
+            if self.tournament.get_competitor(player_id) is not None:
                 raise TournamentEngineException(f"Player with id={player_id} is already in the list of competitors.")
         elif menu_item == COMPETITOR_MENU_NAME:
             first_name = view.prompt_value("First name", str)
@@ -164,6 +218,7 @@ class TournamentEngine:
 
         t_player = TournamentPlayer.from_player(new_player)
         self.tournament.add_competitor(t_player)
+        self._tiebreaks = None
         self._save_tournament()
 
     def _prompt_new_competitor_menu(self) -> int:
@@ -191,6 +246,7 @@ class TournamentEngine:
 
         return isinstance(sample_player, TournamentPlayer)
 
+    @instrumentation.phase('hydrate')
     def _populate_rounds(self) -> None:
         """Populate rounds with data from the tournament's competitors."""
         if not self._has_populated_competitors():
@@ -200,20 +256,15 @@ class TournamentEngine:
         for lean_round in self.tournament.rounds:
             matches = lean_round['matches']
             for match in matches:
-                p1_id = match[0][0]
-                p2_id = match[1][0]
-
-                if p1_id is not None:
-                    tp1, = (tp for tp in self.tournament.competitors if tp.id == p1_id)
-                else:
-                    tp1 = None
-                if p2_id is not None:
-                    tp2, = (tp for tp in self.tournament.competitors if tp.id == p2_id)
-                else:
-                    tp2 = None
+                for player_data in match:
+                    player_id = player_data[0]
+                    if player_id is None:
+                        continue
 
-                match[0][0] = tp1
-                match[1][0] = tp2
+                    t_player = self.tournament.get_competitor(player_id)
+                    if t_player is None:
+                        raise TournamentEngineException(f"Competitor with id={player_id} not found.")
+                    player_data[0] = t_player
 
             rounds.append(Round(lean_round['name'], matches, lean_round['start_date'], lean_round['end_date']))
 
@@ -223,8 +274,20 @@ class TournamentEngine:
         """Persist current tournament's state."""
         self.tournament_registry.update_one(self.tournament)
 
+    def _save_match_result(self, match):
+        """Persist a match's outcome without rewriting the whole tournament (see TournamentsRegistry)."""
+        round_idx = len(self.tournament.rounds) - 1
+        match_idx = next(idx for idx, m in enumerate(self.tournament.last_round.matches) if m is match)
+        self.tournament_registry.record_match_result(self.tournament, round_idx, match_idx)
+
+    @instrumentation.phase('result')
     def _update_match_outcome(self, match, outcome):
-        """Update a match's outcome."""
+        """Update a match's outcome and persist it."""
+        self._apply_match_outcome(match, outcome)
+        self._save_match_result(match)
+
+    def _apply_match_outcome(self, match, outcome):
+        """Update a match's outcome in memory."""
         player1_data, player2_data = match
         player1, score_p1 = player1_data
         player2, score_p2 = player2_data
@@ -254,15 +317,56 @@ class TournamentEngine:
         else:
             raise TournamentEngineException("Invalid match outcome.")
 
+        self.tournament.update_standings(player1, player2)
+        if self._tiebreaks is not None:
+            self._tiebreaks.record(match)
+
+    def _finish_round(self, current_round: Round) -> None:
+        """Mark the current round as finished, then launch the next one or rate the tournament if it is over."""
+        # This cannot be undone, the results of the round must be on disk first (and their errors raised).
+        self.tournament_registry.flush()
+        current_round.finish()
         self._save_tournament()
+        self._launch_next_round()
+        if self.tournament.is_over:
+            self._rate_competitors()
+        if self.flush_on_round:
+            self.tournament_registry.flush()
+
+    def _get_tiebreaks(self) -> Tiebreaks:
+        """The tiebreaks of the competitors, built on first use then updated with each result."""
+        if self._tiebreaks is None:
+            self._tiebreaks = Tiebreaks.from_tournament(self.tournament)
+        return self._tiebreaks
+
+    def _add_round(self, round_name: str, fixtures: list) -> None:
+        self.tournament.add_round(round_name, fixtures)
+        if self._tiebreaks is not None:
+            self._tiebreaks.add_round(self.tournament.last_round.matches)
+
+    def _rate_competitors(self) -> None:
+        """Update the competitors Elo ratings with the results of the tournament, in a single write."""
+        new_ratings = rate_tournament(self.tournament, {player.id: player for player in self.tournament.competitors})
+        players = [player for player in self.players_registry.find_many(list(new_ratings)) if player is not None]
+        for player in players:
+            player.elo = new_ratings[player.id]
+        self.players_registry.update_many(players)
+        view.print_success(f"\nElo ratings of {len(players)} competitor(s) updated.")
 
     def _sort_competitors(self) -> list:
-        """Sort competitors by their score and elo."""
-        return sorted(self.tournament.competitors, key=attrgetter('score', 'elo'), reverse=True)
+        """Sort competitors by their score, tiebreaks and elo.
+
+        The standings already group competitors by score, only players on the same score need the tiebreaks.
+        """
+        tiebreaks = self._get_tiebreaks()
+        return [competitor for score_group in self.tournament.standings.score_groups()
+                for competitor in (score_group if len(score_group) == 1 else tiebreaks.ranked(score_group))]
 
     def _display_scoreboard(self):
         """Display competitors of the current tournament."""
-        sorted_competitors = self._sort_competitors()
+        tiebreaks = self._get_tiebreaks()
+        sorted_competitors = [dict(competitor, **tiebreaks.get(competitor['id']))
+                              for competitor in self._sort_competitors()]
         view.print_tabular_data(COMPETITOR_HEADER, sorted_competitors, f"{self.tournament.name} - Scoreboard")
 
     def _display_tournament_header(self):
@@ -346,8 +450,9 @@ class TournamentEngine:
             if p1 and p2:
                 menu_items[idx + ROUND_MENU_BACK + 1] = f"{p1.full_name} vs {p2.full_name}"
 
+        self.ROUND_MENU_FINISH = None
         if current_round.all_matches_completed:
-            self.ROUND_MENU_FINISH = len(menu_items) + 1
+            self.ROUND_MENU_FINISH = max(menu_items) + 1
             menu_items[self.ROUND_MENU_FINISH] = "Mark as finished (irreversible)"
 
         choice = view.prompt_menu(menu_items)
@@ -417,6 +522,18 @@ class TournamentEngine:
 
     def _launch(self) -> None:
         """Creates the first round of the tournament."""
+        fixtures = self._pair_first_round()
+
+        # Add first round to the tournament.
+        round_name = self._prompt_new_round()
+        self._add_round(round_name, fixtures)
+
+        self._save_tournament()
+        self.resume()
+
+    @instrumentation.phase('pair')
+    def _pair_first_round(self) -> list:
+        """Fixtures of the first round, the top half of the players by elo against the bottom half."""
         # Sort players by elo.
         self.tournament.competitors = self._sort_competitors()
 
@@ -426,50 +543,28 @@ class TournamentEngine:
         bot_players = self.tournament.competitors[middle_idx:]
 
         # Make pairs with players of each list.
-        fixtures = list(itertools.zip_longest(top_players, bot_players))
-
-        # Add first round to the tournament.
-        round_name = self._prompt_new_round()
-        self.tournament.add_round(round_name, fixtures)
-
-        self._save_tournament()
-        self.resume()
+        return list(itertools.zip_longest(top_players, bot_players))
 
     def _launch_next_round(self) -> None:
         if self.tournament.is_over:
             return
 
-        # Sort players by score, then by elo.
-        self.tournament.competitors = self._sort_competitors()
-
-        busy_players = []
-        fixtures = []
-        for ida, player_a in enumerate(self.tournament.competitors[:-1], start=0):
-            if player_a in busy_players:
-                continue
-            for idb, player_b in enumerate(self.tournament.competitors[ida + 1:], start=ida + 1):
-                if player_b in busy_players:
-                    continue
-
-                if not player_a.has_faced(player_b):
-                    fixtures.append((player_a, player_b))
-                    busy_players.append(player_b)
-                    break
-
-                # player_a has faced every other players, make him play with the next player on the scoreboard.
-                if idb == len(self.tournament.competitors) - 1:
-                    next_player = self.tournament.competitors[ida + 1]
-                    fixtures.append((player_a, next_player))
-                    busy_players.append(next_player)
-
-        # Check expected number of fixtures, regarding the number of competitors (odd number of competitors).
-        if len(fixtures) < self.tournament.matches_per_round:
-            busy_ids = {p.id for p in busy_players}
-            all_ids = {p.id for p in self.tournament.competitors}
-            single_player_id = (all_ids - busy_ids).pop()
-            single_player = next((p for p in self.tournament.competitors if p.id == single_player_id))
-            fixtures.append((single_player, None))
+        fixtures = self._pair_next_round()
 
         round_name = self._prompt_new_round()
-        self.tournament.add_round(round_name, fixtures)
+        self._add_round(round_name, fixtures)
         self._save_tournament()
+
+    @instrumentation.phase('pair')
+    def _pair_next_round(self) -> list:
+        """Fixtures of the next round, players are paired by score, then by tiebreaks and elo."""
+        return make_pairings(self._sort_competitors(), self._players_with_bye())
+
+    def _players_with_bye(self) -> set:
+        """Ids of the competitors who already had a bye."""
+        players_with_bye = set()
+        for r in self.tournament.rounds:
+            for (player1, _), (player2, _) in r.matches:
+                if player1 is None or player2 is None:
+                    players_with_bye.add(getattr(player1 or player2, 'id', None))
+        return players_with_bye
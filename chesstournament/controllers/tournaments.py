@@ -1,18 +1,29 @@
 """This module provides the tournaments view."""
 
-from datetime import datetime, MAXYEAR
-from enum import Flag, auto
-from typing import List
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import List, Optional
 
 import typer
 
 from chesstournament import view, __app_name__
 from chesstournament import config
-from chesstournament.models.database import TournamentsRegistry, DatabaseException
+from chesstournament.controllers import listing, players
+from chesstournament.models.database import TournamentsRegistry, DatabaseException, DEFAULT_COMPACTION_THRESHOLD
+from chesstournament.models.player import PlayerException
+from chesstournament.models.storage import Backend
 from chesstournament.models.tournament import Tournament, TournamentException, TIME_FORMAT_TOURNAMENT
 
 app = typer.Typer(add_completion=False)
 
+TOURNAMENT_FILTERS = ("name", "date", "time_control")
+
+
+class TournamentOrder(str, Enum):
+    ID = 'id'
+    RECENT = 'recent'
+
 
 @app.command()
 def add():
@@ -32,59 +43,134 @@ def add():
 
 @app.command("list")
 def list_tournaments(
+        sort: TournamentOrder = typer.Option(
+            TournamentOrder.ID,
+            "--sort",
+            help="Sort the tournaments by id or by date (recent first)."
+        ),
         sort_recent: bool = typer.Option(
             False,
             "--sort-recent",
-            help="Sort the tournaments by date (recent first)"
+            help="Sort the tournaments by date (recent first), same as --sort recent."
         ),
+        filters: Optional[List[str]] = listing.filter_option(
+            "Keys: name (name prefix), date (start date range, YYYY-MM-DD..YYYY-MM-DD), time_control."),
+        limit: Optional[int] = listing.limit_option(),
+        offset: int = listing.offset_option(),
+        pager: bool = listing.pager_option(),
+        output_file: Optional[Path] = listing.file_option()
 ):
     """List saved tournaments, sorted by id (default).
 
-    Combining different sorting options has undefined behavior.
+    Combining different sorting options has undefined behavior. Only the requested page of tournaments is sorted.
     """
-    try:
-        sort_flag = TournamentSort.NONE
-        if sort_recent:
-            sort_flag |= TournamentSort.RECENT
+    if sort_recent:
+        sort = TournamentOrder.RECENT
+    filters = listing.parse_filters(filters, TOURNAMENT_FILTERS)
+    start_date, end_date = listing.parse_range(filters['date'], _parse_date) if 'date' in filters else (None, None)
 
+    try:
         tournament_registry = get_tournaments_registry()
-        saved_tournaments = tournament_registry.get_all()
-
-        sort_tournaments(saved_tournaments, sort_flag)
-        view.print_tournaments(saved_tournaments)
+        saved_tournaments = tournament_registry.query(filters.get('name'), start_date, end_date,
+                                                      filters.get('time_control'), sort, limit, offset)
+        with listing.output_to(output_file, pager):
+            view.print_tournaments(saved_tournaments)
     except (TournamentException, DatabaseException) as error:
-        view.print_error(f'\nCould not retrieve saved players:\n{error.message}')
+        view.print_error(f'\nCould not retrieve saved tournaments:\n{error.message}')
         raise typer.Exit(1)
 
 
-def get_tournaments_registry():
+@app.command()
+def rate(
+        tournament_id: Optional[int] = typer.Option(
+            None,
+            "--id",
+            help="Rate a finished tournament."),
+        rate_all: bool = typer.Option(
+            False,
+            "--all",
+            help="Re-rate the whole history of finished tournaments, in chronological order."),
+        show_changes: bool = typer.Option(
+            False,
+            "--show-changes",
+            help="List every updated rating."),
+        dry_run: bool = typer.Option(
+            False,
+            "--dry-run",
+            help="Compute the changes without saving them.")):
+    """Update players Elo ratings from the results of finished tournaments.
+
+    A tournament is rated from the ratings its competitors had when it was played, so rating it twice
+    gives the same ratings.
+    """
+    # NumPy is only needed here, it is imported on demand.
+    from chesstournament.models import rating
+
+    if (tournament_id is None) == (not rate_all):
+        view.print_error("Use either --id or --all.")
+        raise typer.Exit(1)
+
+    try:
+        tournament_registry = get_tournaments_registry()
+        if rate_all:
+            finished_tournaments = [tournament for tournament in tournament_registry.get_all() if tournament.is_over]
+        else:
+            tournament = tournament_registry.get_by_id(tournament_id)
+            if tournament is None:
+                raise TournamentException(f"Tournament with id={tournament_id} not found.")
+            if not tournament.is_over:
+                raise TournamentException(f"Tournament with id={tournament_id} is not over.")
+            finished_tournaments = [tournament]
+
+        players_registry = players.get_players_registry()
+        player_ids = list({competitor['id'] for tournament in finished_tournaments
+                           for competitor in tournament.competitors})
+        competitors = {player.id: player for player in players_registry.find_many(player_ids) if player is not None}
+        if len(competitors) < len(player_ids):
+            unknown_ids = sorted(set(player_ids) - competitors.keys())
+            raise TournamentException(f"Competitor(s) with id={unknown_ids} not found.")
+
+        if rate_all:
+            new_ratings = rating.rate_history(finished_tournaments, competitors)
+        else:
+            new_ratings = rating.rate_tournament(finished_tournaments[0], competitors)
+
+        changes = []
+        for player_id, elo in new_ratings.items():
+            player = competitors[player_id]
+            if player.elo != elo:
+                changes.append((player, player.elo))
+                player.elo = elo
+        if changes and not dry_run:
+            players_registry.update_many([player for player, _ in changes])
+
+        if show_changes:
+            view.print_tabular_data(
+                players.RATING_CHANGE_COLUMNS,
+                [dict(id=player.id, first_name=player.first_name, last_name=player.last_name, old_elo=old_elo,
+                      elo=player.elo, difference=f"{player.elo - old_elo:+d}") for player, old_elo in changes],
+                heading="Rating changes")
+        view.print_success(
+            f"\n{len(finished_tournaments)} tournament(s) rated, "
+            f"{len(changes)} rating(s) {'to update' if dry_run else 'updated'}.")
+    except (TournamentException, PlayerException, DatabaseException) as error:
+        view.print_error(f'\nTournaments were not rated:\n{error.message}')
+        raise typer.Exit(1)
+
+
+def get_tournaments_registry(compaction_threshold: int = DEFAULT_COMPACTION_THRESHOLD):
     """Create a TournamentsRegistry instance."""
     try:
         db_path = config.get_database_path()
-        tournaments_registry = TournamentsRegistry(str(db_path))
+        backend = Backend(config.get_database_backend())
+        tournaments_registry = TournamentsRegistry(str(db_path), compaction_threshold, backend)
         return tournaments_registry
     except Exception:
         view.print_error(f"Config file not found. Please, run '{__app_name__} init'.")
         raise typer.Exit(1)
 
 
-class TournamentSort(Flag):
-    NONE = 0
-    RECENT = auto()
-
-
-def sort_tournaments(tournaments: List[Tournament], flag: TournamentSort = TournamentSort.NONE) -> None:
-    """Sort tournaments according to the specified flag. Many flags results in undefined behavior."""
-
-    def _sort_recent(tournament: Tournament) -> datetime:
-        # 'None' start_date matches current or future tournaments.
-        try:
-            start_date = datetime.strptime(tournament.start_date, TIME_FORMAT_TOURNAMENT)
-        except TypeError:
-            start_date = datetime(year=MAXYEAR, month=1, day=1)
-        return start_date
-
-    if flag == TournamentSort.NONE:
-        return None
-    if flag == TournamentSort.RECENT:
-        tournaments.sort(key=_sort_recent, reverse=True)
+def _parse_date(value: str) -> str:
+    """Check a YYYY-MM-DD date, ValueError otherwise."""
+    datetime.strptime(value, TIME_FORMAT_TOURNAMENT)
+    return value
@@ -0,0 +1,184 @@
+"""This module measures where the time of a command goes, see the --timings and --profile options.
+
+Methods are marked as phases of a command (load, hydrate, pair, serialize, write, render) with the 'phase'
+decorator. The decorator leaves them untouched until 'enable_timings' is called, so the instrumentation costs
+nothing when it is disabled. Once enabled, every call of a phase is timed and nested under the phase it is
+called from, along with the bytes the storages report reading and writing, and 'report' prints the tree.
+Observers registered with 'observe' are also given the duration of every call of a phase (see metrics).
+The phases run by other threads than the main one are reported under a branch named after their thread.
+"""
+
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Phases are only reported above this share of the total time.
+MIN_REPORTED_SHARE = 0.001
+
+
+class Phase:
+    """A node of the timings tree."""
+
+    __slots__ = ('name', 'calls', 'duration', 'bytes_read', 'bytes_written', 'children')
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.duration = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.children: Dict[str, 'Phase'] = {}
+
+    def child(self, name: str) -> 'Phase':
+        if name not in self.children:
+            self.children[name] = Phase(name)
+        return self.children[name]
+
+    def total_bytes(self) -> tuple:
+        """Bytes read and written by the phase and the phases it called."""
+        bytes_read, bytes_written = self.bytes_read, self.bytes_written
+        for child in list(self.children.values()):
+            child_read, child_written = child.total_bytes()
+            bytes_read += child_read
+            bytes_written += child_written
+        return bytes_read, bytes_written
+
+
+# Marked methods: (class, attribute, function, phase name).
+_hooks: List[tuple] = []
+# The whole command, None while the timings are disabled.
+_root: Optional[Phase] = None
+_start = 0.0
+# The phases being run by each thread, and the bytes it wrote (see _thread_stack).
+_local = threading.local()
+# Phase name: function called with the duration and the bytes written of each call of the phase.
+_observers: Dict[str, Callable[[float, int], None]] = {}
+
+
+def phase(name: str) -> Callable:
+    """Mark a method, classmethod or staticmethod as a phase called 'name'."""
+    def mark(function):
+        return _PhaseMethod(function, name)
+    return mark
+
+
+class _PhaseMethod:
+    """Stands for a marked method until its class is created, then puts back the method, timed if enabled."""
+
+    def __init__(self, function, name: str) -> None:
+        self.function = function
+        self.name = name
+
+    def __set_name__(self, owner, attribute: str) -> None:
+        _hooks.append((owner, attribute, self.function, self.name))
+        setattr(owner, attribute, _timed(self.function, self.name) if _root is not None else self.function)
+
+
+def is_enabled() -> bool:
+    return _root is not None
+
+
+def enable_timings() -> None:
+    """Time the phases from now on."""
+    global _root, _start
+    if _root is not None:
+        return None
+    _root = Phase('total')
+    _local.stack, _local.bytes_written = [_root], 0
+    _start = time.perf_counter()
+    for owner, attribute, function, name in _hooks:
+        setattr(owner, attribute, _timed(function, name))
+
+
+def observe(name: str, observer: Callable[[float, int], None]) -> None:
+    """Call 'observer' with the duration (in seconds) and the bytes written of every call of the phase 'name'.
+
+    Nested calls of a phase, e.g. a registry write flushing the database, are part of the outermost call.
+    """
+    _observers[name] = observer
+
+
+def count_bytes(read: int = 0, written: int = 0) -> None:
+    """Add bytes read from or written to disk to the current phase."""
+    if _root is not None:
+        node = _thread_stack()[-1]
+        node.bytes_read += read
+        node.bytes_written += written
+        _local.bytes_written += written
+
+
+def bytes_counted() -> tuple:
+    """Bytes read and written since the timings were enabled, by every thread."""
+    return (0, 0) if _root is None else _root.total_bytes()
+
+
+def report() -> Iterator[str]:
+    """The lines of the timings tree, each phase with its total time, number of calls and bytes."""
+    if _root is None:
+        return None
+    _root.calls, _root.duration = 1, time.perf_counter() - _start
+    yield f"{'phase':<32} {'time (ms)':>10} {'calls':>7} {'read (KiB)':>11} {'written (KiB)':>14}\n"
+    yield from _report_phase(_root, 0, _root.duration)
+
+
+def _report_phase(node: Phase, depth: int, total: float) -> Iterator[str]:
+    bytes_read, bytes_written = node.total_bytes()
+    yield f"{'  ' * depth + node.name:<32} {_duration(node) * 1000:>10.1f} {node.calls:>7} " \
+          f"{bytes_read / 1024:>11.1f} {bytes_written / 1024:>14.1f}\n"
+    for child in sorted(node.children.values(), key=_duration, reverse=True):
+        if _duration(child) >= total * MIN_REPORTED_SHARE:
+            yield from _report_phase(child, depth + 1, total)
+
+
+def _duration(node: Phase) -> float:
+    """Time spent in a phase, the branch of a thread is never called and lasts as long as its phases."""
+    return node.duration if node.calls else sum(_duration(child) for child in list(node.children.values()))
+
+
+def _thread_stack() -> List[Phase]:
+    """The phases being run by the current thread, other threads than the main one start a branch of the tree."""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = [_root.child(threading.current_thread().name)]
+        _local.bytes_written = 0
+    return stack
+
+
+def _timed(function, name: str):
+    if isinstance(function, (classmethod, staticmethod)):
+        return type(function)(_timed(function.__func__, name))
+
+    @functools.wraps(function)
+    def timed(*args, **kwargs):
+        stack = _thread_stack()
+        parent = stack[-1]
+        node = parent.child(name)
+        stack.append(node)
+        bytes_written = _local.bytes_written
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            node.duration += duration
+            node.calls += 1
+            stack.pop()
+            observer = _observers.get(name)
+            if observer is not None and parent.name != name:
+                observer(duration, _local.bytes_written - bytes_written)
+    return timed
+
+
+def start_profile(path: str) -> Callable[[], None]:
+    """Profile the rest of the command with cProfile, return the function stopping it and saving the stats."""
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    return functools.partial(_stop_profile, profile, path)
+
+
+def _stop_profile(profile, path: str) -> None:
+    profile.disable()
+    profile.dump_stats(path)
@@ -0,0 +1,145 @@
+"""This module exports counters and histograms of the app to a textfile, see the --metrics option.
+
+The metrics are fed by the phases of the instrumentation module: registry reads (load) and writes (write),
+tournament saves, result entries, pairings and renders. The file is rewritten every few seconds by a
+background thread, and a last time on exit, in the Prometheus text format read by the textfile collector
+of node-exporter. It is replaced atomically, so that it is never scraped half written.
+"""
+
+import bisect
+import functools
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterator, List, Sequence
+
+from chesstournament import instrumentation
+from chesstournament.config import DEFAULT_METRICS_INTERVAL
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = tuple(1024 * 4 ** exponent for exponent in range(10))
+
+
+class Counter:
+    """A value that only goes up."""
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def samples(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.description}\n"
+        yield f"# TYPE {self.name} counter\n"
+        yield f"{self.name} {self.value}\n"
+
+
+class Histogram:
+    """Count observations in fixed buckets, allocated once, along with their sum."""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float], omit_empty: bool = False) -> None:
+        """
+        Args
+            omit_empty (bool): leave the histogram out of the export until it has an observation, for the
+                values only some backends report
+        """
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.omit_empty = omit_empty
+        # One count per bucket, the last one for the observations above the highest bound.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self) -> Iterator[str]:
+        # Copied first, so that the buckets and the count agree while the app keeps observing.
+        counts, total = list(self.counts), 0
+        if self.omit_empty and not any(counts):
+            return None
+        yield f"# HELP {self.name} {self.description}\n"
+        yield f"# TYPE {self.name} histogram\n"
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            total += count
+            yield f'{self.name}_bucket{{le="{bound}"}} {total}\n'
+        yield f"{self.name}_count {total}\n"
+        yield f"{self.name}_sum {self.sum}\n"
+
+
+DB_READS = Counter('chesstournament_db_reads_total', "Reads of the players and tournaments registries.")
+DB_WRITES = Counter('chesstournament_db_writes_total', "Writes of the players and tournaments registries.")
+DB_READ_BYTES = Counter('chesstournament_db_read_bytes_total',
+                        "Bytes read from JSON databases and results journals.")
+DB_WRITTEN_BYTES = Counter('chesstournament_db_written_bytes_total',
+                           "Bytes written to JSON databases and results journals.")
+# SQLite does not report the bytes it writes, and cached writes only reach the disk on flush.
+SAVE_BYTES = Histogram('chesstournament_save_tournament_bytes',
+                       "Bytes written to disk by each write of a tournament to a JSON database.", SIZE_BUCKETS,
+                       omit_empty=True)
+RESULT_ENTRY_SECONDS = Histogram('chesstournament_result_entry_seconds',
+                                 "Time to record a match result, persistence included.", LATENCY_BUCKETS)
+PAIRING_SECONDS = Histogram('chesstournament_pairing_seconds', "Time to pair a round.", LATENCY_BUCKETS)
+RENDER_SECONDS = Histogram('chesstournament_render_seconds', "Time to print a table.", LATENCY_BUCKETS)
+
+METRICS: List = [DB_READS, DB_WRITES, DB_READ_BYTES, DB_WRITTEN_BYTES, SAVE_BYTES, RESULT_ENTRY_SECONDS,
+                 PAIRING_SECONDS, RENDER_SECONDS]
+
+
+def export(path: str, interval: float = DEFAULT_METRICS_INTERVAL) -> Callable[[], None]:
+    """Collect the metrics from now on and write them to 'path' every 'interval' seconds.
+
+    The file is written once right away, so that an unwritable path fails early. Return the function
+    stopping the exports and writing the final values, errors of the periodic writes are left to it.
+    """
+    instrumentation.enable_timings()
+    instrumentation.observe('load', lambda duration, bytes_written: DB_READS.inc())
+    instrumentation.observe('write', lambda duration, bytes_written: DB_WRITES.inc())
+    instrumentation.observe('save', _observe_save)
+    instrumentation.observe('result', lambda duration, bytes_written: RESULT_ENTRY_SECONDS.observe(duration))
+    instrumentation.observe('pair', lambda duration, bytes_written: PAIRING_SECONDS.observe(duration))
+    instrumentation.observe('render', lambda duration, bytes_written: RENDER_SECONDS.observe(duration))
+    write(path)
+
+    stopped = threading.Event()
+
+    def write_periodically():
+        while not stopped.wait(interval):
+            try:
+                write(path)
+            except OSError:
+                pass
+
+    threading.Thread(target=write_periodically, name='metrics', daemon=True).start()
+    return functools.partial(_stop_export, stopped, path)
+
+
+def _observe_save(duration: float, bytes_written: int) -> None:
+    # Saves writing nothing went to a backend or a cache that does not report bytes, see SAVE_BYTES.
+    if bytes_written:
+        SAVE_BYTES.observe(bytes_written)
+
+
+def _stop_export(stopped: threading.Event, path: str) -> None:
+    stopped.set()
+    write(path)
+
+
+def write(path: str) -> None:
+    """Write the current value of the metrics to 'path', through a temporary file renamed over it."""
+    DB_READ_BYTES.value, DB_WRITTEN_BYTES.value = instrumentation.bytes_counted()
+    # Next to the file so that the rename stays on the same filesystem, the collector skips non .prom files.
+    temporary_path = Path(f"{path}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with temporary_path.open('w') as file:
+            for metric in METRICS:
+                file.writelines(metric.samples())
+        os.replace(temporary_path, path)
+    except OSError:
+        temporary_path.unlink(missing_ok=True)
+        raise
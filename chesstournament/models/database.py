@@ -1,27 +1,69 @@
 """This module handles the operations with the database."""
 
+import functools
+import heapq
+import itertools
+import json
+from datetime import datetime, MAXYEAR
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List, Optional
 
-from tinydb import TinyDB, where
-
-from chesstournament import DB_READ_ERROR, DB_WRITE_ERROR, SUCCESS, ERRORS
+from chesstournament import DB_READ_ERROR, DB_WRITE_ERROR, SUCCESS, ERRORS, instrumentation
+from chesstournament.config import DEFAULT_COMPACTION_THRESHOLD, DEFAULT_DB_LOCATION
 from chesstournament.models.player import Player
-from chesstournament.models.tournament import Tournament
+from chesstournament.models import session
+from chesstournament.models.indexes import PlayerNameIndex, normalize_name
+from chesstournament.models.storage import Backend, Storage, open_storage
+from chesstournament.models.tournament import LazyTournament, Tournament, TIME_FORMAT_TOURNAMENT
 
-DEFAULT_DB_LOCATION = Path.home() / '.chess_tournament.json'
+PLAYER_ORDERS = ('id', 'name', 'elo')
+TOURNAMENT_ORDERS = ('id', 'recent')
 
 
-def create_database(db_path: Path = DEFAULT_DB_LOCATION) -> int:
+def create_database(db_path: Path = DEFAULT_DB_LOCATION, backend: Backend = Backend.TINYDB) -> int:
     """Create a local database file at 'db_path'."""
     try:
-        TinyDB(db_path)
-    except OSError:
+        open_storage(str(db_path), backend).close()
+    except Exception:
         return DB_WRITE_ERROR
 
     return SUCCESS
 
 
+def migrate_database(source_path: Path, target: Storage) -> int:
+    """Import the players and tournaments of a TinyDB database file into 'target', keeping their ids.
+
+    The import is done in a single transaction of 'target', nothing is imported when it fails.
+    """
+    # TinyDB would create a missing file.
+    if not source_path.exists():
+        return DB_READ_ERROR
+    try:
+        source = open_storage(str(source_path), Backend.TINYDB)
+    except Exception:
+        return DB_READ_ERROR
+
+    try:
+        with target.transaction():
+            _import_documents(source, str(source_path), target)
+    except Exception:
+        return DB_WRITE_ERROR
+    finally:
+        source.close()
+
+    return SUCCESS
+
+
+def _import_documents(source: Storage, source_path: str, target: Storage) -> None:
+    for player in source.get_players():
+        target.insert_player(player, player.doc_id)
+    for tournament in source.get_tournaments():
+        journal_path = TournamentsRegistry.journal_path(source_path, tournament.doc_id)
+        if journal_path.exists():
+            TournamentsRegistry.replay_journal(tournament, journal_path)
+        target.insert_tournament(tournament, tournament.doc_id)
+
+
 class DatabaseException(Exception):
     """The database module raises this when an exception occurs."""
 
@@ -31,96 +73,421 @@ class DatabaseException(Exception):
 
 
 class PlayersRegistry:
-    """Manage players in the database."""
+    """Manage players in the database.
+
+    Lookups by name go through an in-memory index of the players names, built on the first lookup and kept
+    up to date by this registry's writes.
+    """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, backend: Backend = Backend.TINYDB) -> None:
         try:
-            self._database = TinyDB(db_path)
+            self._storage = session.get_storage(db_path, backend)
         except Exception:
             raise DatabaseException(DB_READ_ERROR)
+        self._name_index = None
 
+    @instrumentation.phase('write')
     def add(self, new_player: Player) -> int:
         del new_player.id
 
         try:
-            new_player.id = self._database.table('players').insert(new_player)
+            new_player.id = self._storage.insert_player(new_player)
+            if self._name_index is not None:
+                self._name_index.add(new_player.id, new_player)
             return new_player.id
         except Exception:
             raise DatabaseException(DB_WRITE_ERROR)
 
+    @instrumentation.phase('write')
+    def add_many(self, new_players: List[Player]) -> List[int]:
+        """Add several players in a single write."""
+        for new_player in new_players:
+            del new_player.id
+
+        try:
+            player_ids = self._storage.insert_players(new_players)
+        except Exception:
+            raise DatabaseException(DB_WRITE_ERROR)
+
+        for new_player, player_id in zip(new_players, player_ids):
+            new_player.id = player_id
+            if self._name_index is not None:
+                self._name_index.add(player_id, new_player)
+        return player_ids
+
+    @instrumentation.phase('load')
     def get_all(self) -> List[Player]:
         try:
-            players = self._database.table('players').all()
+            players = self._storage.get_players()
             return [Player(**player, id=player.doc_id) for player in players]
         except Exception:
             raise DatabaseException(DB_READ_ERROR)
 
+    def iter_all(self) -> Iterator[Player]:
+        """Iterate over the saved players without loading them all at once (as far as the backend allows)."""
+        try:
+            for player in self._storage.iter_players():
+                yield Player(**player, id=player.doc_id)
+        except Exception:
+            raise DatabaseException(DB_READ_ERROR)
+
+    @instrumentation.phase('load')
     def find(self, player_id: int, first_name: str = None, last_name: str = None) -> Player:
         try:
             if player_id:
-                player = self._database.table('players').get(doc_id=player_id)
+                player = self._storage.get_player(player_id)
                 return None if player is None else Player(**player, id=player.doc_id)
             else:
-                players = self._database.table('players').search(where('last_name') == last_name.upper())
+                name_index = self._get_name_index()
+                player_ids = name_index.search(last_name)
 
-                if len(players) == 1:
-                    player, = players
-                    return None if player is None else Player(**player, id=player.doc_id)
-                else:
-                    players = [p for p in players if p['first_name'] == first_name.capitalize()]
-                    player = players[0] if len(players) else None
-                    return None if player is None else Player(**player, id=player.doc_id)
+                if len(player_ids) != 1:
+                    player_ids = name_index.search(last_name, first_name)
+                player = self._storage.get_player(player_ids[0]) if len(player_ids) else None
+                return None if player is None else Player(**player, id=player.doc_id)
         except Exception:
             raise DatabaseException(DB_READ_ERROR)
 
+    @instrumentation.phase('load')
+    def search(self, last_name: str, first_name: str = None, prefix: bool = False) -> List[Player]:
+        """Find players by name, regardless of case and accents.
+
+        With 'prefix', names only have to start with the given values.
+        """
+        try:
+            player_ids = self._get_name_index().search(last_name, first_name, prefix)
+            players = [self._storage.get_player(player_id) for player_id in player_ids]
+            return [Player(**player, id=player.doc_id) for player in players]
+        except Exception:
+            raise DatabaseException(DB_READ_ERROR)
+
+    def query(self, name: Optional[str] = None, min_elo: Optional[int] = None, max_elo: Optional[int] = None,
+              order_by: str = 'id', limit: Optional[int] = None, offset: int = 0) -> Iterator[Player]:
+        """Iterate over a page of the players matching the filters, sorted by 'order_by' (one of PLAYER_ORDERS).
+
+        'name' is a last name prefix, regardless of case and accents. Name lookups and the name order walk the
+        name index, the Elo order keeps the best 'offset + limit' players in a heap and the id order streams the
+        players, so that only the requested page is ever sorted.
+        """
+        if order_by not in PLAYER_ORDERS:
+            raise ValueError(f"Unknown order '{order_by}', expected one of {PLAYER_ORDERS}.")
+        stop = None if limit is None else offset + limit
+        with_elo_range = min_elo is not None or max_elo is not None
+
+        try:
+            if name is not None or order_by == 'name':
+                player_ids = self._get_name_index().search(name or '', prefix=True)
+                if order_by == 'id':
+                    player_ids.sort()
+                if not with_elo_range and order_by != 'elo':
+                    return iter(self.find_many(player_ids[offset:stop]))
+                players = iter(self.find_many(player_ids))
+            else:
+                players = self.iter_all()
+
+            if with_elo_range:
+                players = (player for player in players if (min_elo is None or player.elo >= min_elo)
+                           and (max_elo is None or player.elo <= max_elo))
+            if order_by == 'elo':
+                players = _top(players, stop, key=lambda player: (-player.elo, player.id))
+            return itertools.islice(players, offset, stop)
+        except DatabaseException:
+            raise
+        except Exception:
+            raise DatabaseException(DB_READ_ERROR)
+
+    @instrumentation.phase('load')
+    def find_many(self, player_ids: List[int]) -> List[Player]:
+        """Find several players by id with a single read of the storage.
+
+        Players are returned in the same order as 'player_ids', unknown ids map to None.
+        """
+        try:
+            players = {player.doc_id: player for player in self._storage.get_players(player_ids)}
+            return [None if players.get(player_id) is None else Player(**players[player_id], id=player_id)
+                    for player_id in player_ids]
+        except Exception:
+            raise DatabaseException(DB_READ_ERROR)
+
+    @instrumentation.phase('write')
     def update_one(self, player: Player) -> int:
         player_id = player.id
         del player.id
 
         try:
-            doc_id, = self._database.table('players').update(player, doc_ids=[player_id])
+            doc_id = self._storage.update_player(player_id, player)
             player.id = doc_id
+            if self._name_index is not None:
+                self._name_index.add(doc_id, player)
             return doc_id
         except Exception:
             raise DatabaseException(DB_WRITE_ERROR)
 
+    @instrumentation.phase('write')
+    def update_many(self, players: List[Player]) -> List[int]:
+        """Update several players in a single write, all of them or none."""
+        updates = {}
+        for player in players:
+            player_id = player.id
+            del player.id
+            updates[player_id] = dict(player)
+            player.id = player_id
+
+        try:
+            player_ids = self._storage.update_players(updates)
+        except Exception:
+            raise DatabaseException(DB_WRITE_ERROR)
+
+        if self._name_index is not None:
+            for player in players:
+                self._name_index.add(player.id, player)
+        return player_ids
+
+    @instrumentation.phase('write')
+    def flush(self) -> None:
+        """Write the pending changes of the database session to disk."""
+        try:
+            self._storage.flush()
+        except Exception:
+            raise DatabaseException(DB_WRITE_ERROR)
+
+    def _get_name_index(self) -> PlayerNameIndex:
+        if self._name_index is None:
+            self._name_index = PlayerNameIndex((player.doc_id, player) for player in self._storage.get_players())
+        return self._name_index
+
 
 class TournamentsRegistry:
-    """Manage tournaments in the database."""
+    """Manage tournaments in the database.
+
+    Match results can be recorded incrementally: each result is appended to a per-tournament journal file
+    next to the database, and the journal is compacted into the tournament document by 'update_one'.
+    A 'compaction_threshold' of 0 disables the journal, every result then rewrites the whole tournament.
+    When the storage writes behind, compacted journals are removed once the tournament is on disk, by 'flush'
+    or when the database session is closed.
+    """
 
-    def __init__(self, db_path: str) -> None:
-        self._database = TinyDB(db_path)
+    def __init__(self, db_path: str, compaction_threshold: int = DEFAULT_COMPACTION_THRESHOLD,
+                 backend: Backend = Backend.TINYDB) -> None:
+        try:
+            self._storage = session.get_storage(db_path, backend)
+        except Exception:
+            raise DatabaseException(DB_READ_ERROR)
+        self._db_path = db_path
+        self._compaction_threshold = compaction_threshold
+        self._journal_sizes = {}
+        # Ids of the tournaments whose journal is compacted into the document waiting to be written.
+        self._compacted_journals = set()
 
+    @instrumentation.phase('write')
     def add(self, new_tournament: Tournament) -> int:
         del new_tournament.id
 
         try:
-            new_tournament.id = self._database.table('tournaments').insert(new_tournament)
+            new_tournament.id = self._storage.insert_tournament(new_tournament.serialize())
             return new_tournament.id
         except Exception:
             raise DatabaseException(DB_WRITE_ERROR)
 
+    @instrumentation.phase('load')
     def get_all(self) -> List[Tournament]:
         try:
-            tournaments = self._database.table('tournaments').all()
-            return [Tournament(**tournament, id=tournament.doc_id) for tournament in tournaments]
+            tournaments = self._storage.get_tournaments()
+            return [self._load(tournament) for tournament in tournaments]
+        except Exception:
+            raise DatabaseException(DB_READ_ERROR)
+
+    @instrumentation.phase('load')
+    def get_summaries(self) -> List[Tournament]:
+        """Load the header fields of the tournaments only, their competitors and rounds are loaded on access."""
+        try:
+            summaries = self._storage.get_tournament_summaries()
+            return [LazyTournament(functools.partial(self._load_content, summary.doc_id), **summary, id=summary.doc_id)
+                    for summary in summaries]
         except Exception:
             raise DatabaseException(DB_READ_ERROR)
 
-    def get_by_id(self, tournament_id: int):
+    def query(self, name: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              time_control: Optional[str] = None, order_by: str = 'id', limit: Optional[int] = None,
+              offset: int = 0) -> Iterator[Tournament]:
+        """Iterate over a page of the tournaments matching the filters, sorted by 'order_by' (one of TOURNAMENT_ORDERS).
+
+        'name' is a name prefix, regardless of case and accents, 'start_date' and 'end_date' bound the start date
+        of the tournaments (YYYY-mm-dd). Only the summaries are read (see get_summaries), the recent first order
+        keeps the first 'offset + limit' tournaments in a heap.
+        """
+        if order_by not in TOURNAMENT_ORDERS:
+            raise ValueError(f"Unknown order '{order_by}', expected one of {TOURNAMENT_ORDERS}.")
+        stop = None if limit is None else offset + limit
+        name = None if name is None else normalize_name(name)
+
+        def is_match(tournament: Tournament) -> bool:
+            if name is not None and not normalize_name(tournament.name).startswith(name):
+                return False
+            if time_control is not None and tournament.time_control != time_control:
+                return False
+            if start_date is not None or end_date is not None:
+                return tournament.start_date is not None \
+                    and (start_date is None or tournament.start_date >= start_date) \
+                    and (end_date is None or tournament.start_date <= end_date)
+            return True
+
+        def recent_first(tournament: Tournament):
+            # Tournaments without a start date are current or future tournaments, they come first.
+            if tournament.start_date is None:
+                return -datetime(year=MAXYEAR, month=1, day=1).toordinal(), tournament.id
+            return -datetime.strptime(tournament.start_date, TIME_FORMAT_TOURNAMENT).toordinal(), tournament.id
+
+        tournaments = (tournament for tournament in self.get_summaries() if is_match(tournament))
+        if order_by == 'recent':
+            tournaments = _top(tournaments, stop, key=recent_first)
+        return itertools.islice(tournaments, offset, stop)
+
+    @instrumentation.phase('load')
+    def get_by_id(self, tournament_id: int) -> Optional[Tournament]:
+        """Load a tournament, None when there is no tournament with this id."""
         try:
-            tournament = self._database.table('tournaments').get(doc_id=tournament_id)
-            return Tournament(**tournament, id=tournament.doc_id)
+            tournament = self._storage.get_tournament(tournament_id)
+            return None if tournament is None else self._load(tournament)
         except Exception:
             raise DatabaseException(DB_READ_ERROR)
 
+    @instrumentation.phase('write')
     def update_one(self, tournament: Tournament):
         tournament_id = tournament.id
         del tournament.id
 
         try:
-            doc_id, = self._database.table('tournaments').update(tournament.serialize(), doc_ids=[tournament_id])
+            doc_id = self._storage.update_tournament(tournament_id, tournament.serialize())
             tournament.id = doc_id
-            return doc_id
+        except Exception:
+            # A failed background write surfaces here, the tournament is still the one being run.
+            tournament.id = tournament_id
+            raise DatabaseException(DB_WRITE_ERROR)
+
+        # The tournament document is up to date, the pending results are now redundant once it is on disk.
+        if self.journal_path(self._db_path, doc_id).exists():
+            self._compacted_journals.add(doc_id)
+            if self._storage.writes_behind:
+                session.on_close(self._remove_compacted_journals)
+            else:
+                self.flush()
+        self._journal_sizes[doc_id] = 0
+        return doc_id
+
+    @instrumentation.phase('write')
+    def flush(self) -> None:
+        """Write the pending changes of the database session to disk, then remove the compacted journals."""
+        try:
+            self._storage.flush()
+        except Exception:
+            raise DatabaseException(DB_WRITE_ERROR)
+        self._remove_compacted_journals()
+
+    def _remove_compacted_journals(self) -> None:
+        """Remove the journals compacted into documents written to disk."""
+        while self._compacted_journals:
+            try:
+                self.journal_path(self._db_path, self._compacted_journals.pop()).unlink(missing_ok=True)
+            except OSError:
+                raise DatabaseException(DB_WRITE_ERROR)
+
+    @instrumentation.phase('write')
+    def record_match_result(self, tournament: Tournament, round_idx: int, match_idx: int) -> None:
+        """Persist the outcome of a single match of 'tournament'.
+
+        The entry holds the match scores and the resulting state of both players, so that replaying it
+        on the stored tournament document is idempotent.
+        """
+        if self._compaction_threshold <= 0:
+            self.update_one(tournament)
+            return None
+
+        match = tournament.rounds[round_idx].matches[match_idx]
+        entry = {
+            'round': round_idx,
+            'match': match_idx,
+            'scores': [player_data[1] for player_data in match],
+            'competitors': [player_data[0].serialize() for player_data in match if player_data[0] is not None]
+        }
+
+        try:
+            self._storage.check_writes()
+        except Exception:
+            raise DatabaseException(DB_WRITE_ERROR)
+        # The journal now holds a result missing from the compacted document.
+        self._compacted_journals.discard(tournament.id)
+
+        try:
+            journal_path = self.journal_path(self._db_path, tournament.id)
+            journal_path.parent.mkdir(exist_ok=True)
+            line = json.dumps(entry) + '\n'
+            with journal_path.open('a') as journal:
+                journal.write(line)
+            instrumentation.count_bytes(written=len(line))
+        except OSError:
+            raise DatabaseException(DB_WRITE_ERROR)
+
+        self._journal_sizes[tournament.id] = self._journal_sizes.get(tournament.id, 0) + 1
+        if self._journal_sizes[tournament.id] >= self._compaction_threshold:
+            self.update_one(tournament)
+
+    @staticmethod
+    def journal_path(db_path: str, tournament_id: int) -> Path:
+        """Location of the results journal of a tournament."""
+        return Path(f"{db_path}.journal") / f"tournament-{tournament_id}.jsonl"
+
+    def _load(self, document) -> Tournament:
+        """Build a Tournament from its stored document and its pending journal entries."""
+        self._replay_pending_results(document)
+        return Tournament(**document, id=document.doc_id)
+
+    @instrumentation.phase('load')
+    def _load_content(self, tournament_id: int):
+        """Load the stored document of a tournament along with its pending journal entries."""
+        try:
+            document = self._storage.get_tournament(tournament_id)
+            self._replay_pending_results(document)
+            return document
         except Exception:
             raise DatabaseException(DB_READ_ERROR)
+
+    def _replay_pending_results(self, document) -> None:
+        journal_path = self.journal_path(self._db_path, document.doc_id)
+        if journal_path.exists():
+            self._journal_sizes[document.doc_id] = self.replay_journal(document, journal_path)
+            if instrumentation.is_enabled():
+                instrumentation.count_bytes(read=journal_path.stat().st_size)
+
+    @staticmethod
+    def replay_journal(document: dict, journal_path: Path) -> int:
+        """Apply journal entries to a lean tournament document, return the number of entries."""
+        competitors = document['competitors']
+        competitor_indexes = {competitor['id']: idx for idx, competitor in enumerate(competitors)}
+
+        nb_of_entries = 0
+        with journal_path.open() as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # An interrupted append leaves a truncated last line, the result was never acknowledged.
+                    break
+                # The entries of other rounds than the last one of the document are stale: the document was
+                # written after the round was finished, or its new round never reached the disk.
+                if entry['round'] != len(document['rounds']) - 1:
+                    continue
+                match = document['rounds'][entry['round']]['matches'][entry['match']]
+                for player_data, score in zip(match, entry['scores']):
+                    player_data[1] = score
+                for competitor in entry['competitors']:
+                    competitors[competitor_indexes[competitor['id']]] = competitor
+                nb_of_entries += 1
+        return nb_of_entries
+
+
+def _top(items: Iterable, number: Optional[int], key) -> list:
+    """Sort items by 'key', keeping only the first 'number' of them (all of them when None)."""
+    if number is None:
+        return sorted(items, key=key)
+    return heapq.nsmallest(number, items, key=key)
@@ -0,0 +1,127 @@
+"""This module provides in-memory indexes over the stored documents."""
+
+import math
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+IndexKey = Tuple[str, str, int]
+StandingKey = Tuple[float, int, int]
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for comparisons: case and accent insensitive."""
+    decomposed = unicodedata.normalize('NFKD', name.strip())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+class PlayerNameIndex:
+    """Sorted (last_name, first_name, id) index of players, on normalized names.
+
+    Exact and prefix lookups are a binary search followed by a scan of the matching keys only.
+    """
+
+    def __init__(self, players: Iterable[Tuple[int, Mapping]] = ()) -> None:
+        self._entries: Dict[int, IndexKey] = {
+            player_id: self._key(player_id, player) for player_id, player in players}
+        self._keys: List[IndexKey] = sorted(self._entries.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, player_id: int, player: Mapping) -> None:
+        """Index a player, or re-index it if its name changed."""
+        key = self._key(player_id, player)
+        old_key = self._entries.get(player_id)
+        if old_key == key:
+            return None
+        if old_key is not None:
+            del self._keys[bisect_left(self._keys, old_key)]
+
+        self._entries[player_id] = key
+        insort(self._keys, key)
+
+    def search(self, last_name: str, first_name: Optional[str] = None, prefix: bool = False) -> List[int]:
+        """Return the ids of the players matching the names, sorted by normalized names.
+
+        With 'prefix', names only have to start with the given values.
+        """
+        last_name = normalize_name(last_name)
+        first_name = None if first_name is None else normalize_name(first_name)
+
+        if prefix:
+            matches = self._scan((last_name,), lambda key: key[0].startswith(last_name))
+            if first_name is not None:
+                matches = (key for key in matches if key[1].startswith(first_name))
+        elif first_name is None:
+            matches = self._scan((last_name,), lambda key: key[0] == last_name)
+        else:
+            matches = self._scan((last_name, first_name), lambda key: key[:2] == (last_name, first_name))
+        return [key[2] for key in matches]
+
+    def _scan(self, start: tuple, is_match) -> Iterator[IndexKey]:
+        for idx in range(bisect_left(self._keys, start), len(self._keys)):
+            key = self._keys[idx]
+            if not is_match(key):
+                return
+            yield key
+
+    @staticmethod
+    def _key(player_id: int, player: Mapping) -> IndexKey:
+        return normalize_name(player['last_name']), normalize_name(player['first_name']), player_id
+
+
+class Standings:
+    """Competitors of a tournament sorted by score then Elo, best first, kept sorted as results come in.
+
+    Rank, top-N and score group queries are binary searches over the sorted (-score, -elo, id) keys.
+    """
+
+    def __init__(self, competitors: Iterable[Mapping] = ()) -> None:
+        self._competitors: Dict[int, Mapping] = {competitor['id']: competitor for competitor in competitors}
+        self._entries: Dict[int, StandingKey] = {
+            competitor_id: self._key(competitor) for competitor_id, competitor in self._competitors.items()}
+        self._keys: List[StandingKey] = sorted(self._entries.values())
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, competitor: Mapping) -> None:
+        """Add a competitor, or move it to its new place after its score changed."""
+        key = self._key(competitor)
+        old_key = self._entries.get(competitor['id'])
+        self._competitors[competitor['id']] = competitor
+        if old_key == key:
+            return None
+        if old_key is not None:
+            del self._keys[bisect_left(self._keys, old_key)]
+
+        self._entries[competitor['id']] = key
+        insort(self._keys, key)
+
+    def rank(self, competitor_id: int) -> int:
+        """Return the 1-based rank of a competitor."""
+        return bisect_left(self._keys, self._entries[competitor_id]) + 1
+
+    def top(self, number: int) -> list:
+        """Return the 'number' best competitors."""
+        return [self._competitors[key[2]] for key in self._keys[:number]]
+
+    def on_score(self, score: float) -> list:
+        """Return the competitors with the given score, by decreasing Elo."""
+        start = bisect_left(self._keys, (-score,))
+        end = bisect_right(self._keys, (-score, math.inf))
+        return [self._competitors[key[2]] for key in self._keys[start:end]]
+
+    def score_groups(self) -> Iterator[list]:
+        """Iterate over the groups of competitors with the same score, best score first."""
+        start = 0
+        while start < len(self._keys):
+            score = self._keys[start][0]
+            end = bisect_right(self._keys, (score, math.inf), start)
+            yield [self._competitors[key[2]] for key in self._keys[start:end]]
+            start = end
+
+    @staticmethod
+    def _key(competitor: Mapping) -> StandingKey:
+        return -competitor['score'], -competitor['elo'], competitor['id']
@@ -23,6 +23,12 @@ class PlayerException(Exception):
 class Player(Mapping):
     """This models a chess player."""
 
+    __slots__ = ('_first_name', '_last_name', '_birth_date', '_sex', '_elo', 'id')
+
+    # Fields exposed through the Mapping interface, in the order they are stored.
+    _FIELDS = ('first_name', 'last_name', 'birth_date', 'sex', 'elo', 'id')
+    _FIELDS_WITHOUT_ID = _FIELDS[:-1]
+
     def __init__(self,
                  first_name: str,
                  last_name: str,
@@ -39,22 +45,26 @@ class Player(Mapping):
         self.id = id
 
     def __len__(self):
-        return len(self.__dict__)
+        return len(self._fields())
 
     def __getitem__(self, item):
         return getattr(self, item)
 
     def __iter__(self):
-        return iter(key.lstrip('_') for key in self.__dict__)
+        return iter(self._fields())
 
     def __str__(self):
-        dict_representation = {key.lstrip('_'): value for key, value in self.__dict__.items()}
+        dict_representation = {field: getattr(self, field) for field in self._fields()}
         return str(dict_representation)
 
     def __repr__(self):
         return f"{self.__class__.__name__}" \
                f"({self._first_name}, {self._last_name}, {self._birth_date}, {self._sex}, {self._elo})"
 
+    def _fields(self) -> tuple:
+        """The registries delete 'id' while storing a player, it is then left out of the Mapping."""
+        return self._FIELDS if hasattr(self, 'id') else self._FIELDS_WITHOUT_ID
+
     @property
     def first_name(self):
         return self._first_name
@@ -116,6 +126,12 @@ class Player(Mapping):
 class TournamentPlayer(Player):
     """This models a chess player in the context of a specific tournament."""
 
+    # The set of faced opponents mirrors the ordered 'previous_opponents' for constant time lookups.
+    __slots__ = ('_previous_opponents', '_faced_ids', '_score')
+
+    _FIELDS = Player._FIELDS + ('previous_opponents', 'score')
+    _FIELDS_WITHOUT_ID = tuple(field for field in _FIELDS if field != 'id')
+
     def __init__(self,
                  id: int,
                  first_name: str,
@@ -145,10 +161,11 @@ class TournamentPlayer(Player):
             raise PlayerException('A TournamentPlayer opponents must be another TournamentPlayer.')
 
         self._previous_opponents.append(new_opponent.id)
+        self._faced_ids.add(new_opponent.id)
 
     def has_faced(self, other_player):
         """Checks if this player has faced the other_player."""
-        return other_player.id in self._previous_opponents
+        return other_player.id in self._faced_ids
 
     def wins(self):
         """Updates player's state after winning."""
@@ -160,7 +177,8 @@ class TournamentPlayer(Player):
 
     def serialize(self):
         """Returns a lean version dictionary of the instance."""
-        return {'id': self.id, 'score': self.score, 'elo': self._elo, 'previous_opponents': self.previous_opponents}
+        return {'id': self.id, 'score': self.score, 'elo': self._elo,
+                'previous_opponents': list(self.previous_opponents)}
 
     @property
     def score(self):
@@ -183,6 +201,7 @@ class TournamentPlayer(Player):
             self._previous_opponents = []
         else:
             self._previous_opponents = saved_opponents
+        self._faced_ids = set(self._previous_opponents)
 
     @property
     def last_opponent(self) -> id:
@@ -190,6 +209,4 @@ class TournamentPlayer(Player):
 
     @classmethod
     def from_player(cls, player: Player):
-        player_dict = dict(player)
-
-        return cls(**player_dict)
+        return cls(player.id, player.first_name, player.last_name, player.birth_date, player.sex, player.elo)
@@ -0,0 +1,94 @@
+"""This module computes Elo ratings from tournament results.
+
+Ratings follow the FIDE rules: the rating change of a player is K * (score - expected score) summed over their
+rated games, where the expected score against an opponent is 1 / (1 + 10 ** ((opponent - player) / 400)).
+All the games of a tournament are rated at once from the ratings players had when entering it.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from chesstournament.models.player import Player
+from chesstournament.models.tournament import Tournament, TIME_FORMAT_TOURNAMENT
+
+MIN_RATING = 100
+K_FACTOR_JUNIOR = 40
+K_FACTOR_DEFAULT = 20
+K_FACTOR_ELITE = 10
+JUNIOR_AGE = 18
+JUNIOR_MAX_RATING = 2300
+ELITE_RATING = 2400
+
+
+def rate_tournament(tournament: Tournament, players: Mapping[int, Player],
+                    ratings: Optional[Mapping[int, int]] = None) -> Dict[int, int]:
+    """Return the new rating of each competitor of a tournament.
+
+    Arguments:
+        tournament -- a tournament, either populated or as loaded from the database.
+        players -- the competitors' Player, by id (their birth date decides of the K-factor).
+        ratings -- the ratings before the tournament, by id, defaults to the Elo stored with each competitor.
+    """
+    competitor_ids = [competitor['id'] for competitor in tournament.competitors]
+    if ratings is None:
+        ratings = {competitor['id']: competitor['elo'] for competitor in tournament.competitors}
+
+    indexes = {player_id: idx for idx, player_id in enumerate(competitor_ids)}
+    white, black, white_score = _games(tournament, indexes)
+    before = np.array([ratings[player_id] for player_id in competitor_ids], dtype=float)
+
+    birth_dates = [players[player_id].birth_date for player_id in competitor_ids]
+    k_factors = _k_factors(before, birth_dates, _tournament_date(tournament))
+
+    expected = 1 / (1 + 10 ** ((before[black] - before[white]) / 400))
+    changes = np.zeros(len(competitor_ids))
+    np.add.at(changes, white, k_factors[white] * (white_score - expected))
+    np.add.at(changes, black, k_factors[black] * (expected - white_score))
+
+    after = np.maximum(np.rint(before + changes), MIN_RATING).astype(int)
+    return dict(zip(competitor_ids, after.tolist()))
+
+
+def rate_history(tournaments: Iterable[Tournament], players: Mapping[int, Player]) -> Dict[int, int]:
+    """Rate finished tournaments in chronological order, each one from the ratings the previous ones produced.
+
+    Players enter the history with the Elo stored with them in their first tournament.
+    Returns the final rating of every player who took part in a rated tournament.
+    """
+    ratings = {}
+    for tournament in sorted(tournaments, key=_tournament_date):
+        for competitor in tournament.competitors:
+            ratings.setdefault(competitor['id'], competitor['elo'])
+        ratings.update(rate_tournament(tournament, players, ratings))
+    return ratings
+
+
+def _games(tournament: Tournament, indexes: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten the played games of a tournament into arrays of white and black indexes and white scores.
+
+    Byes and games without a result are not rated.
+    """
+    white, black, white_score = [], [], []
+    for tournament_round in tournament.rounds:
+        for (player1, score1), (player2, _) in tournament_round['matches']:
+            if player1 is None or player2 is None or score1 is None:
+                continue
+            white.append(indexes[getattr(player1, 'id', player1)])
+            black.append(indexes[getattr(player2, 'id', player2)])
+            white_score.append(score1)
+    return np.array(white, dtype=int), np.array(black, dtype=int), np.array(white_score, dtype=float)
+
+
+def _k_factors(ratings: np.ndarray, birth_dates: List[str], date: datetime) -> np.ndarray:
+    birth_years = np.array([datetime.strptime(birth_date, '%Y-%m-%d').year for birth_date in birth_dates])
+    k_factors = np.full(len(ratings), K_FACTOR_DEFAULT, dtype=float)
+    k_factors[ratings >= ELITE_RATING] = K_FACTOR_ELITE
+    k_factors[(date.year - birth_years < JUNIOR_AGE) & (ratings < JUNIOR_MAX_RATING)] = K_FACTOR_JUNIOR
+    return k_factors
+
+
+def _tournament_date(tournament: Tournament) -> datetime:
+    date = tournament.end_date or tournament.start_date
+    return datetime.strptime(date, TIME_FORMAT_TOURNAMENT) if date else datetime.now()
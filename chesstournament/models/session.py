@@ -0,0 +1,81 @@
+"""This module provides the process-wide database session shared by the registries.
+
+Every registry opened on the same database gets the same storage, so the database file is parsed once and
+there is a single writer. Pending writes are flushed every 'write_cache_size' writes, whenever 'flush' is
+called (e.g. at the end of a round) and when the process exits, including on SIGTERM. With 'write_behind',
+tournaments are written by a background thread (see WriteBehindStorage). Functions given to 'on_close' run
+once the storages are closed, i.e. once every write is on disk.
+"""
+
+import atexit
+import signal
+import threading
+from typing import Callable, Dict, List, Tuple
+
+from chesstournament.config import DEFAULT_WRITE_CACHE_SIZE
+from chesstournament.models.storage import Backend, Storage, WriteBehindStorage, open_storage
+
+_settings = {'write_cache_size': DEFAULT_WRITE_CACHE_SIZE, 'write_behind': False}
+_storages: Dict[Tuple[str, Backend], Storage] = {}
+_close_callbacks: List[Callable[[], None]] = []
+
+
+def configure(write_cache_size: int = DEFAULT_WRITE_CACHE_SIZE, write_behind: bool = False) -> None:
+    """Set the durability/throughput tradeoff of the session, must be called before opening a storage."""
+    if write_cache_size < 1:
+        raise ValueError("write_cache_size must be a positive number of writes.")
+    _settings['write_cache_size'] = write_cache_size
+    _settings['write_behind'] = write_behind
+
+
+def get_storage(db_path: str, backend: Backend = Backend.TINYDB) -> Storage:
+    """Return the storage of the session for 'db_path', open it on first use."""
+    key = (db_path, backend)
+    if key not in _storages:
+        if not _storages:
+            _install_exit_handlers()
+        storage = open_storage(db_path, backend, _settings['write_cache_size'])
+        _storages[key] = WriteBehindStorage(storage) if _settings['write_behind'] else storage
+    return _storages[key]
+
+
+def flush() -> None:
+    """Write the pending changes of every open storage to disk."""
+    for storage in _storages.values():
+        storage.flush()
+
+
+def on_close(callback: Callable[[], None]) -> None:
+    """Call 'callback' once the session is closed, unless writing the pending changes fails."""
+    if callback not in _close_callbacks:
+        _close_callbacks.append(callback)
+
+
+def close() -> None:
+    """Flush and close every open storage, the first error is raised once they are all closed."""
+    error = None
+    while _storages:
+        _, storage = _storages.popitem()
+        try:
+            storage.close()
+        except Exception as storage_error:
+            error = error or storage_error
+    if error is not None:
+        _close_callbacks.clear()
+        raise error
+
+    while _close_callbacks:
+        _close_callbacks.pop(0)()
+
+
+def _install_exit_handlers() -> None:
+    atexit.register(close)
+
+    # SIGTERM kills the process without running atexit callbacks, turn it into a regular exit.
+    if threading.current_thread() is threading.main_thread() \
+            and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, _exit_on_signal)
+
+
+def _exit_on_signal(signum, frame):
+    raise SystemExit(128 + signum)
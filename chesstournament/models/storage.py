@@ -0,0 +1,648 @@
+"""This module provides the storage backends used by the registries."""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Mapping, Optional
+
+from tinydb import TinyDB
+from tinydb.middlewares import CachingMiddleware
+from tinydb.storages import JSONStorage
+from tinydb.table import Document
+
+from chesstournament import instrumentation
+from chesstournament.config import Backend
+
+PLAYER_FIELDS = ('first_name', 'last_name', 'birth_date', 'sex', 'elo')
+TOURNAMENT_FIELDS = (
+    'name', 'location', 'number_of_rounds', 'description', 'time_control', 'start_date', 'end_date')
+
+# SQLite limits the number of host parameters of a statement.
+SQLITE_MAX_PARAMETERS = 900
+
+
+class StorageException(Exception):
+    """Storage backends raise this when a document cannot be found or written."""
+
+    def __init__(self, message: str) -> None:
+        """
+        Args
+            message (str): description of the error
+        """
+        self.message = message
+        super().__init__(self.message)
+
+
+class Storage(ABC):
+    """Document oriented interface shared by the storage backends.
+
+    Documents are returned as tinydb.table.Document instances, i.e. dictionaries carrying their 'doc_id'.
+    Players documents hold PLAYER_FIELDS, tournaments documents hold TOURNAMENT_FIELDS along with their lean
+    'competitors' and 'rounds' (see Tournament.serialize).
+    """
+
+    # Whether the writes are done by a background thread (see WriteBehindStorage).
+    writes_behind = False
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+
+    @abstractmethod
+    def insert_player(self, player: Mapping, doc_id: Optional[int] = None) -> int:
+        """Insert a player document and return its id, 'doc_id' forces the id."""
+
+    @abstractmethod
+    def insert_players(self, players: Iterable[Mapping]) -> List[int]:
+        """Insert several player documents in one write and return their ids."""
+
+    @abstractmethod
+    def get_player(self, doc_id: int) -> Optional[Document]:
+        """Return the player document with the given id, or None."""
+
+    @abstractmethod
+    def get_players(self, doc_ids: Optional[Iterable[int]] = None) -> List[Document]:
+        """Return the players documents with the given ids (all of them by default), sorted by id."""
+
+    def iter_players(self) -> Iterator[Document]:
+        """Iterate over all the players documents, sorted by id."""
+        return iter(self.get_players())
+
+    @abstractmethod
+    def update_player(self, doc_id: int, player: Mapping) -> int:
+        """Update the fields of a player document."""
+
+    @abstractmethod
+    def update_players(self, players: Mapping[int, Mapping]) -> List[int]:
+        """Update the fields of several player documents, given by id, in one write."""
+
+    @abstractmethod
+    def insert_tournament(self, tournament: Mapping, doc_id: Optional[int] = None) -> int:
+        """Insert a tournament document and return its id, 'doc_id' forces the id."""
+
+    @abstractmethod
+    def get_tournament(self, doc_id: int) -> Optional[Document]:
+        """Return the tournament document with the given id, or None."""
+
+    @abstractmethod
+    def get_tournaments(self) -> List[Document]:
+        """Return all the tournaments documents, sorted by id."""
+
+    @abstractmethod
+    def get_tournament_summaries(self) -> List[Document]:
+        """Return the TOURNAMENT_FIELDS of all the tournaments documents, without their content, sorted by id."""
+
+    @abstractmethod
+    def update_tournament(self, doc_id: int, tournament: Mapping) -> int:
+        """Replace the content of a tournament document."""
+
+    def flush(self) -> None:
+        """Write pending changes to disk, storages writing through have nothing to do."""
+
+    def check_writes(self) -> None:
+        """Raise the error of a failed background write, storages writing synchronously have nothing to do."""
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Keep the writes of the block only if it completes, storages without transactions write as they go."""
+        yield
+
+    def close(self) -> None:
+        """Release the resources held by the storage."""
+
+
+class AtomicJSONStorage(JSONStorage):
+    """TinyDB's JSON storage, writing the database to a new file renamed over the old one.
+
+    A crash during a write leaves either the old or the new database, never half of one. The bytes read and
+    written are reported while the timings are enabled.
+    """
+
+    def read(self):
+        data = super().read()
+        if instrumentation.is_enabled():
+            # The whole file was just parsed (or found empty), the position is its size.
+            instrumentation.count_bytes(read=self._handle.tell())
+        return data
+
+    def write(self, data):
+        path, encoding = self._handle.name, self._handle.encoding
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, 'w', encoding=encoding) as temporary_file:
+            temporary_file.write(json.dumps(data, **self.kwargs))
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+            size = temporary_file.tell()
+
+        # Windows does not rename over open files.
+        self._handle.close()
+        try:
+            os.replace(temporary_path, path)
+        finally:
+            self._handle = open(path, mode=self._mode, encoding=encoding)
+        if instrumentation.is_enabled():
+            instrumentation.count_bytes(written=size)
+
+
+class TinyDBStorage(Storage):
+    """Store documents in a single JSON file with TinyDB.
+
+    With a 'write_cache_size', the file is parsed once and the database is kept in memory: writes are only
+    dumped to disk every 'write_cache_size' writes, on 'flush' and on 'close'.
+    """
+
+    def __init__(self, db_path: str, write_cache_size: Optional[int] = None) -> None:
+        super().__init__(db_path)
+        if write_cache_size is None:
+            self._database = TinyDB(db_path, storage=AtomicJSONStorage)
+            self._cache = None
+        else:
+            self._database = TinyDB(db_path, storage=CachingMiddleware(AtomicJSONStorage))
+            self._cache = self._database.storage
+            self._cache.WRITE_CACHE_SIZE = write_cache_size
+
+    def insert_player(self, player: Mapping, doc_id: Optional[int] = None) -> int:
+        return self._insert('players', player, doc_id)
+
+    def insert_players(self, players: Iterable[Mapping]) -> List[int]:
+        return self._database.table('players').insert_multiple(players)
+
+    def get_player(self, doc_id: int) -> Optional[Document]:
+        return self._database.table('players').get(doc_id=doc_id)
+
+    def get_players(self, doc_ids: Optional[Iterable[int]] = None) -> List[Document]:
+        players = self._database.table('players').all()
+        if doc_ids is None:
+            return players
+
+        doc_ids = set(doc_ids)
+        return [player for player in players if player.doc_id in doc_ids]
+
+    def update_player(self, doc_id: int, player: Mapping) -> int:
+        return self._update('players', doc_id, player)
+
+    def update_players(self, players: Mapping[int, Mapping]) -> List[int]:
+        # Table.update() only sets the same fields on every document, and Table.update_multiple() cannot select
+        # documents by id: the documents are updated through the storage, with a single read and write.
+        data = self._database.storage.read() or {}
+        table = data.get('players', {})
+        missing_ids = [doc_id for doc_id in players if str(doc_id) not in table]
+        if missing_ids:
+            raise StorageException(f"No documents with ids={sorted(missing_ids)} in the players table.")
+        for doc_id, player in players.items():
+            table[str(doc_id)].update(player)
+
+        self._database.storage.write(data)
+        # The table caches its query results.
+        self._database.table('players').clear_cache()
+        return list(players.keys())
+
+    def insert_tournament(self, tournament: Mapping, doc_id: Optional[int] = None) -> int:
+        return self._insert('tournaments', self._detach(tournament), doc_id)
+
+    def get_tournament(self, doc_id: int) -> Optional[Document]:
+        tournament = self._database.table('tournaments').get(doc_id=doc_id)
+        return None if tournament is None else self._detach(tournament)
+
+    def get_tournaments(self) -> List[Document]:
+        return [self._detach(tournament) for tournament in self._database.table('tournaments').all()]
+
+    def get_tournament_summaries(self) -> List[Document]:
+        return [Document({field: tournament[field] for field in TOURNAMENT_FIELDS}, tournament.doc_id)
+                for tournament in self._database.table('tournaments').all()]
+
+    @instrumentation.phase('save')
+    def update_tournament(self, doc_id: int, tournament: Mapping) -> int:
+        return self._update('tournaments', doc_id, self._detach(tournament))
+
+    @instrumentation.phase('write')
+    def flush(self) -> None:
+        if self._cache is not None:
+            self._cache.flush()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        # TinyDB has no transactions: the database is restored as it was before the block.
+        data = copy.deepcopy(self._database.storage.read())
+        try:
+            yield
+        except BaseException:
+            self._database.storage.write(data or {})
+            for table_name in self._database.tables():
+                self._database.table(table_name).clear_cache()
+            raise
+
+    @instrumentation.phase('write')
+    def close(self) -> None:
+        self._database.close()
+
+    def _detach(self, tournament: Mapping) -> Mapping:
+        """Copy a tournament document going through the cache.
+
+        TinyDB only makes shallow copies, the nested competitors and rounds would otherwise be shared between
+        the cached database and the caller.
+        """
+        if self._cache is None:
+            return tournament
+        if isinstance(tournament, Document):
+            return Document(copy.deepcopy(dict(tournament)), tournament.doc_id)
+        return copy.deepcopy(dict(tournament))
+
+    def _insert(self, table_name: str, document: Mapping, doc_id: Optional[int]) -> int:
+        if doc_id is not None:
+            document = Document(document, doc_id)
+        return self._database.table(table_name).insert(document)
+
+    def _update(self, table_name: str, doc_id: int, document: Mapping) -> int:
+        updated_ids = self._database.table(table_name).update(document, doc_ids=[doc_id])
+        if len(updated_ids) != 1:
+            raise StorageException(f"No document with id={doc_id} in the {table_name} table.")
+        return updated_ids[0]
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    birth_date TEXT NOT NULL,
+    sex TEXT NOT NULL,
+    elo INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS players_last_name_idx ON players (last_name, first_name);
+
+CREATE TABLE IF NOT EXISTS tournaments (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    location TEXT NOT NULL,
+    number_of_rounds INTEGER NOT NULL,
+    description TEXT,
+    time_control TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS competitors (
+    tournament_id INTEGER NOT NULL REFERENCES tournaments (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    player_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    elo INTEGER NOT NULL,
+    previous_opponents TEXT NOT NULL,
+    PRIMARY KEY (tournament_id, position)
+);
+CREATE INDEX IF NOT EXISTS competitors_player_id_idx ON competitors (player_id);
+
+CREATE TABLE IF NOT EXISTS rounds (
+    tournament_id INTEGER NOT NULL REFERENCES tournaments (id) ON DELETE CASCADE,
+    round_idx INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    start_date TEXT,
+    end_date TEXT,
+    PRIMARY KEY (tournament_id, round_idx)
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    tournament_id INTEGER NOT NULL,
+    round_idx INTEGER NOT NULL,
+    match_idx INTEGER NOT NULL,
+    player1_id INTEGER,
+    player1_score REAL,
+    player2_id INTEGER,
+    player2_score REAL,
+    PRIMARY KEY (tournament_id, round_idx, match_idx),
+    FOREIGN KEY (tournament_id, round_idx) REFERENCES rounds (tournament_id, round_idx) ON DELETE CASCADE
+);
+"""
+
+
+class SQLiteStorage(Storage):
+    """Store documents in a SQLite database, with one table per entity."""
+
+    def __init__(self, db_path: str) -> None:
+        super().__init__(db_path)
+        # The connection is used by the thread of WriteBehindStorage too, which serializes the accesses.
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute('PRAGMA foreign_keys = ON')
+        self._connection.executescript(SQLITE_SCHEMA)
+        self._in_transaction = False
+
+    def insert_player(self, player: Mapping, doc_id: Optional[int] = None) -> int:
+        with self.transaction():
+            cursor = self._connection.execute(
+                f"INSERT INTO players (id, {', '.join(PLAYER_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                (doc_id, *(player[field] for field in PLAYER_FIELDS)))
+        return cursor.lastrowid
+
+    def insert_players(self, players: Iterable[Mapping]) -> List[int]:
+        doc_ids = []
+        with self.transaction():
+            for player in players:
+                cursor = self._connection.execute(
+                    f"INSERT INTO players ({', '.join(PLAYER_FIELDS)}) VALUES (?, ?, ?, ?, ?)",
+                    tuple(player[field] for field in PLAYER_FIELDS))
+                doc_ids.append(cursor.lastrowid)
+        return doc_ids
+
+    def get_player(self, doc_id: int) -> Optional[Document]:
+        row = self._connection.execute('SELECT * FROM players WHERE id = ?', (doc_id,)).fetchone()
+        return None if row is None else self._player_document(row)
+
+    def get_players(self, doc_ids: Optional[Iterable[int]] = None) -> List[Document]:
+        if doc_ids is None:
+            rows = self._connection.execute('SELECT * FROM players ORDER BY id')
+            return [self._player_document(row) for row in rows]
+
+        doc_ids = sorted(set(doc_ids))
+        players = []
+        for start in range(0, len(doc_ids), SQLITE_MAX_PARAMETERS):
+            chunk = doc_ids[start:start + SQLITE_MAX_PARAMETERS]
+            rows = self._connection.execute(
+                f"SELECT * FROM players WHERE id IN ({', '.join('?' * len(chunk))}) ORDER BY id", chunk)
+            players.extend(self._player_document(row) for row in rows)
+        return players
+
+    def iter_players(self) -> Iterator[Document]:
+        for row in self._connection.execute('SELECT * FROM players ORDER BY id'):
+            yield self._player_document(row)
+
+    def update_player(self, doc_id: int, player: Mapping) -> int:
+        fields = [field for field in PLAYER_FIELDS if field in player]
+        with self.transaction():
+            cursor = self._connection.execute(
+                f"UPDATE players SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?",
+                (*(player[field] for field in fields), doc_id))
+        if cursor.rowcount != 1:
+            raise StorageException(f"No document with id={doc_id} in the players table.")
+        return doc_id
+
+    def update_players(self, players: Mapping[int, Mapping]) -> List[int]:
+        with self.transaction():
+            for doc_id, player in players.items():
+                fields = [field for field in PLAYER_FIELDS if field in player]
+                cursor = self._connection.execute(
+                    f"UPDATE players SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?",
+                    (*(player[field] for field in fields), doc_id))
+                if cursor.rowcount != 1:
+                    raise StorageException(f"No document with id={doc_id} in the players table.")
+        return list(players.keys())
+
+    def insert_tournament(self, tournament: Mapping, doc_id: Optional[int] = None) -> int:
+        with self.transaction():
+            cursor = self._connection.execute(
+                f"INSERT INTO tournaments (id, {', '.join(TOURNAMENT_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, *(tournament[field] for field in TOURNAMENT_FIELDS)))
+            doc_id = cursor.lastrowid
+            self._insert_tournament_content(doc_id, tournament)
+        return doc_id
+
+    def get_tournament(self, doc_id: int) -> Optional[Document]:
+        documents = self._select_tournaments('WHERE tournament_id = ?', (doc_id,))
+        return documents[0] if documents else None
+
+    def get_tournaments(self) -> List[Document]:
+        return self._select_tournaments()
+
+    def get_tournament_summaries(self) -> List[Document]:
+        rows = self._connection.execute(f"SELECT id, {', '.join(TOURNAMENT_FIELDS)} FROM tournaments ORDER BY id")
+        return [Document({field: row[field] for field in TOURNAMENT_FIELDS}, row['id']) for row in rows]
+
+    @instrumentation.phase('save')
+    def update_tournament(self, doc_id: int, tournament: Mapping) -> int:
+        with self.transaction():
+            cursor = self._connection.execute(
+                f"UPDATE tournaments SET {', '.join(f'{field} = ?' for field in TOURNAMENT_FIELDS)} WHERE id = ?",
+                (*(tournament[field] for field in TOURNAMENT_FIELDS), doc_id))
+            if cursor.rowcount != 1:
+                raise StorageException(f"No document with id={doc_id} in the tournaments table.")
+
+            for table_name in ('matches', 'rounds', 'competitors'):
+                self._connection.execute(f"DELETE FROM {table_name} WHERE tournament_id = ?", (doc_id,))
+            self._insert_tournament_content(doc_id, tournament)
+        return doc_id
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        # The writes of the block join its transaction instead of committing their own.
+        if self._in_transaction:
+            yield
+            return None
+        self._in_transaction = True
+        try:
+            with self._connection:
+                yield
+        finally:
+            self._in_transaction = False
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _insert_tournament_content(self, doc_id: int, tournament: Mapping) -> None:
+        """Insert the competitors and rounds of a tournament, the caller handles the transaction."""
+        self._connection.executemany(
+            'INSERT INTO competitors VALUES (?, ?, ?, ?, ?, ?)',
+            ((doc_id, position, competitor['id'], competitor['score'], competitor['elo'],
+              json.dumps(competitor['previous_opponents']))
+             for position, competitor in enumerate(tournament['competitors'])))
+        self._connection.executemany(
+            'INSERT INTO rounds VALUES (?, ?, ?, ?, ?)',
+            ((doc_id, round_idx, lean_round['name'], lean_round['start_date'], lean_round['end_date'])
+             for round_idx, lean_round in enumerate(tournament['rounds'])))
+        self._connection.executemany(
+            'INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((doc_id, round_idx, match_idx, p1_data[0], p1_data[1], p2_data[0], p2_data[1])
+             for round_idx, lean_round in enumerate(tournament['rounds'])
+             for match_idx, (p1_data, p2_data) in enumerate(lean_round['matches'])))
+
+    def _select_tournaments(self, condition: str = '', parameters: tuple = ()) -> List[Document]:
+        """Rebuild tournaments documents with one query per table."""
+        competitors = defaultdict(list)
+        rows = self._connection.execute(
+            f"SELECT * FROM competitors {condition} ORDER BY tournament_id, position", parameters)
+        for row in rows:
+            competitors[row['tournament_id']].append({
+                'id': row['player_id'],
+                'score': self._number(row['score']),
+                'elo': row['elo'],
+                'previous_opponents': json.loads(row['previous_opponents'])
+            })
+
+        matches = defaultdict(list)
+        rows = self._connection.execute(
+            f"SELECT * FROM matches {condition} ORDER BY tournament_id, round_idx, match_idx", parameters)
+        for row in rows:
+            matches[(row['tournament_id'], row['round_idx'])].append([
+                [row['player1_id'], self._number(row['player1_score'])],
+                [row['player2_id'], self._number(row['player2_score'])]
+            ])
+
+        rounds = defaultdict(list)
+        rows = self._connection.execute(
+            f"SELECT * FROM rounds {condition} ORDER BY tournament_id, round_idx", parameters)
+        for row in rows:
+            rounds[row['tournament_id']].append({
+                'name': row['name'],
+                'matches': matches[(row['tournament_id'], row['round_idx'])],
+                'start_date': row['start_date'],
+                'end_date': row['end_date']
+            })
+
+        documents = []
+        condition = condition.replace('tournament_id', 'id')
+        rows = self._connection.execute(f"SELECT * FROM tournaments {condition} ORDER BY id", parameters)
+        for row in rows:
+            document = {field: row[field] for field in TOURNAMENT_FIELDS}
+            document['competitors'] = competitors[row['id']]
+            document['rounds'] = rounds[row['id']]
+            documents.append(Document(document, row['id']))
+        return documents
+
+    @staticmethod
+    def _player_document(row: sqlite3.Row) -> Document:
+        return Document({field: row[field] for field in PLAYER_FIELDS}, row['id'])
+
+    @staticmethod
+    def _number(value: Optional[float]):
+        """Scores are stored as REAL, give back integers for whole values like the JSON storage does."""
+        return int(value) if value is not None and value.is_integer() else value
+
+
+class WriteBehindStorage(Storage):
+    """Write the tournaments documents of another storage from a background thread.
+
+    'update_tournament' only hands the document over to the thread, which writes the latest document of each
+    tournament: the documents given in the meantime are dropped. The documents must not be modified once given,
+    Tournament.serialize returns such snapshots. The other operations are done right away, reading tournaments
+    first writes the pending documents. A failed write is raised by the next operation (see 'check_writes'),
+    its document is written again by the next 'flush'. 'close' writes the pending documents.
+    """
+
+    writes_behind = True
+
+    def __init__(self, storage: Storage) -> None:
+        super().__init__(storage.db_path)
+        self._storage = storage
+        # Serializes the accesses to the storage, which is not thread safe.
+        self._lock = threading.Lock()
+        # Guards the pending documents, the error and the state of the thread, and wakes the thread up.
+        self._condition = threading.Condition()
+        self._pending = {}
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_in_background, name='write-behind', daemon=True)
+        self._thread.start()
+
+    def insert_player(self, player: Mapping, doc_id: Optional[int] = None) -> int:
+        return self._call(self._storage.insert_player, player, doc_id)
+
+    def insert_players(self, players: Iterable[Mapping]) -> List[int]:
+        return self._call(self._storage.insert_players, players)
+
+    def get_player(self, doc_id: int) -> Optional[Document]:
+        return self._call(self._storage.get_player, doc_id)
+
+    def get_players(self, doc_ids: Optional[Iterable[int]] = None) -> List[Document]:
+        return self._call(self._storage.get_players, doc_ids)
+
+    def update_player(self, doc_id: int, player: Mapping) -> int:
+        return self._call(self._storage.update_player, doc_id, player)
+
+    def update_players(self, players: Mapping[int, Mapping]) -> List[int]:
+        return self._call(self._storage.update_players, players)
+
+    def insert_tournament(self, tournament: Mapping, doc_id: Optional[int] = None) -> int:
+        return self._call(self._storage.insert_tournament, tournament, doc_id)
+
+    def get_tournament(self, doc_id: int) -> Optional[Document]:
+        self._write_pending()
+        return self._call(self._storage.get_tournament, doc_id)
+
+    def get_tournaments(self) -> List[Document]:
+        self._write_pending()
+        return self._call(self._storage.get_tournaments)
+
+    def get_tournament_summaries(self) -> List[Document]:
+        self._write_pending()
+        return self._call(self._storage.get_tournament_summaries)
+
+    def update_tournament(self, doc_id: int, tournament: Mapping) -> int:
+        self.check_writes()
+        with self._condition:
+            self._pending[doc_id] = tournament
+            self._condition.notify()
+        return doc_id
+
+    def flush(self) -> None:
+        # The pending documents are written before a failed background write is raised: unless a newer document
+        # replaced it, the failed one is among them.
+        try:
+            self._write_pending()
+            with self._lock:
+                self._storage.flush()
+        finally:
+            self.check_writes()
+
+    def check_writes(self) -> None:
+        with self._condition:
+            error, self._error = self._error, None
+        if error is not None:
+            raise StorageException(f"Failed to write a tournament in the background: {error}") from error
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        try:
+            self.flush()
+        finally:
+            self._storage.close()
+
+    def _call(self, method, *args):
+        self.check_writes()
+        with self._lock:
+            return method(*args)
+
+    def _write_pending(self) -> None:
+        """Write the pending documents, the ones that fail are kept for the next write unless replaced."""
+        with self._lock:
+            with self._condition:
+                pending, self._pending = self._pending, {}
+            while pending:
+                doc_id, tournament = next(iter(pending.items()))
+                try:
+                    self._storage.update_tournament(doc_id, tournament)
+                except Exception:
+                    with self._condition:
+                        self._pending = {**pending, **self._pending}
+                    raise
+                del pending[doc_id]
+
+    def _write_in_background(self) -> None:
+        while True:
+            with self._condition:
+                # After a failure, wait for the error to be raised before trying again.
+                while (not self._pending or self._error is not None) and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return None
+            try:
+                self._write_pending()
+            except Exception as error:
+                with self._condition:
+                    self._error = error
+
+
+def open_storage(db_path: str, backend: Backend = Backend.TINYDB, write_cache_size: Optional[int] = None) -> Storage:
+    """Open the storage of the given backend at 'db_path'.
+
+    'write_cache_size' enables the write-back cache of the TinyDB backend, SQLite commits every write.
+    """
+    if backend == Backend.SQLITE:
+        return SQLiteStorage(db_path)
+    return TinyDBStorage(db_path, write_cache_size)
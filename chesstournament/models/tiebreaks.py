@@ -0,0 +1,102 @@
+"""This module computes the tiebreaks used to rank the competitors of a tournament.
+
+The results are kept in a competitor x round matrix, along with the matching opponents matrix, so every
+tiebreak is a handful of array operations over the whole field:
+    - Buchholz: the sum of the scores of the opponents faced.
+    - Median-Buchholz: the Buchholz without the best and the worst opponents (from 3 games on).
+    - Sonneborn-Berger: the sum of the scores of the opponents beaten plus half the scores of those drawn.
+    - Progressive: the sum of the cumulative scores after each round.
+Byes count for the score and the progressive score only.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+TIEBREAKS = ('buchholz', 'median_buchholz', 'sonneborn_berger', 'progressive')
+
+NO_OPPONENT = -1
+
+
+class Tiebreaks:
+    """Results matrix of a tournament, updated as rounds are added and results recorded."""
+
+    def __init__(self, player_ids: Iterable[int], number_of_rounds: int) -> None:
+        self._player_ids = list(player_ids)
+        self._indexes = {player_id: idx for idx, player_id in enumerate(self._player_ids)}
+        self._results = np.full((len(self._player_ids), number_of_rounds), np.nan)
+        self._opponents = np.full((len(self._player_ids), number_of_rounds), NO_OPPONENT, dtype=int)
+        self._nb_of_rounds = 0
+        self._table: Optional[Dict[str, np.ndarray]] = None
+
+    @classmethod
+    def from_tournament(cls, tournament):
+        """Build the matrix of a tournament, populated or as loaded from the database."""
+        tiebreaks = cls((competitor['id'] for competitor in tournament.competitors),
+                        max(tournament.number_of_rounds, len(tournament.rounds)))
+        for tournament_round in tournament.rounds:
+            tiebreaks.add_round(tournament_round['matches'])
+        return tiebreaks
+
+    def add_round(self, matches: list) -> None:
+        """Add a column for a new round, with the results it already has (byes)."""
+        if self._nb_of_rounds == self._results.shape[1]:
+            self._results = np.pad(self._results, ((0, 0), (0, 1)), constant_values=np.nan)
+            self._opponents = np.pad(self._opponents, ((0, 0), (0, 1)), constant_values=NO_OPPONENT)
+        self._nb_of_rounds += 1
+        for match in matches:
+            self.record(match)
+
+    def record(self, match) -> None:
+        """Record the outcome of a match of the last round."""
+        column = self._nb_of_rounds - 1
+        (player1, score1), (player2, score2) = match
+        idx1 = self._indexes.get(getattr(player1, 'id', player1))
+        idx2 = self._indexes.get(getattr(player2, 'id', player2))
+
+        for idx, score, opponent_idx in ((idx1, score1, idx2), (idx2, score2, idx1)):
+            if idx is None:
+                continue
+            self._results[idx, column] = np.nan if score is None else score
+            self._opponents[idx, column] = NO_OPPONENT if opponent_idx is None else opponent_idx
+        self._table = None
+
+    def get(self, player_id: int) -> Dict[str, float]:
+        """Return the tiebreaks of a competitor."""
+        idx = self._indexes[player_id]
+        return {name: self._compute()[name][idx].item() for name in TIEBREAKS}
+
+    def ranked(self, players: List[Mapping]) -> list:
+        """Sort competitors by score, tiebreaks (in the order of TIEBREAKS), then Elo, best first."""
+        table = self._compute()
+        rows = np.array([self._indexes[player['id']] for player in players], dtype=int)
+        elos = np.array([player['elo'] for player in players])
+
+        # np.lexsort sorts on the last key first.
+        keys = [-elos] + [-table[name][rows] for name in reversed(TIEBREAKS)] + [-table['score'][rows]]
+        return [players[idx] for idx in np.lexsort(keys)]
+
+    def _compute(self) -> Dict[str, np.ndarray]:
+        if self._table is not None:
+            return self._table
+
+        results = self._results[:, :self._nb_of_rounds]
+        opponents = self._opponents[:, :self._nb_of_rounds]
+        scores = np.nansum(results, axis=1)
+
+        played = (opponents != NO_OPPONENT) & ~np.isnan(results)
+        opponent_scores = np.where(played, scores[opponents], 0)
+        buchholz = opponent_scores.sum(axis=1)
+
+        cut = played.sum(axis=1) > 2
+        best = np.where(played, opponent_scores, -np.inf).max(axis=1, initial=-np.inf)
+        worst = np.where(played, opponent_scores, np.inf).min(axis=1, initial=np.inf)
+        median_buchholz = buchholz.copy()
+        median_buchholz[cut] -= best[cut] + worst[cut]
+
+        sonneborn_berger = (np.where(played, results, 0) * opponent_scores).sum(axis=1)
+        progressive = np.cumsum(np.nan_to_num(results), axis=1).sum(axis=1)
+
+        self._table = {'score': scores, 'buchholz': buchholz, 'median_buchholz': median_buchholz,
+                       'sonneborn_berger': sonneborn_berger, 'progressive': progressive}
+        return self._table
@@ -3,8 +3,10 @@
 import math
 from collections.abc import Mapping
 from datetime import datetime
-from typing import Union, List, Optional, Tuple
+from typing import Callable, Union, List, Optional, Tuple
 
+from chesstournament import instrumentation
+from chesstournament.models.indexes import Standings
 from chesstournament.models.player import TournamentPlayer
 
 TIME_CONTROLS = ['bullet', 'blitz', 'rapid']
@@ -26,6 +28,11 @@ class TournamentException(Exception):
 
 
 class Round(Mapping):
+    __slots__ = ('_name', '_matches', '_start_date', '_end_date')
+
+    # Fields exposed through the Mapping interface, in the order they are stored.
+    _FIELDS = ('name', 'matches', 'start_date', 'end_date')
+
     def __init__(self, name: str, matches: list, start_date: Union[str, None] = None,
                  end_date: Union[str, None] = None) -> None:
         self._name = name
@@ -34,16 +41,16 @@ class Round(Mapping):
         self._end_date = end_date
 
     def __len__(self):
-        return len(self.__dict__)
+        return len(self._FIELDS)
 
     def __getitem__(self, item):
         return getattr(self, item)
 
     def __iter__(self):
-        return iter(key.lstrip('_') for key in self.__dict__)
+        return iter(self._FIELDS)
 
     def __str__(self):
-        dict_representation = {key.lstrip('_'): value for key, value in self.__dict__.items()}
+        dict_representation = {field: getattr(self, field) for field in self._FIELDS}
         return str(dict_representation)
 
     def __repr__(self):
@@ -123,6 +130,16 @@ class Round(Mapping):
 
 
 class Tournament(Mapping):
+    # The competitors are also indexed by id and by standing, the indexes are neither exposed through the Mapping
+    # nor persisted.
+    __slots__ = ('_name', '_location', '_number_of_rounds', '_description', '_time_control', '_start_date',
+                 '_end_date', '_competitors', '_competitors_by_id', '_standings', '_rounds', 'id')
+
+    # Fields exposed through the Mapping interface, in the order they are stored.
+    _FIELDS = ('name', 'location', 'number_of_rounds', 'description', 'time_control', 'start_date', 'end_date',
+               'competitors', 'rounds', 'id')
+    _FIELDS_WITHOUT_ID = _FIELDS[:-1]
+
     def __init__(self,
                  name: str,
                  location: str,
@@ -148,16 +165,16 @@ class Tournament(Mapping):
         self.id = id
 
     def __len__(self):
-        return len(self.__dict__)
+        return len(self._fields())
 
     def __getitem__(self, item):
         return getattr(self, item)
 
     def __iter__(self):
-        return iter(key.lstrip('_') for key in self.__dict__)
+        return iter(self._fields())
 
     def __str__(self):
-        dict_representation = {key.lstrip('_'): value for key, value in self.__dict__.items()}
+        dict_representation = {field: getattr(self, field) for field in self._fields()}
         return str(dict_representation)
 
     def __repr__(self):
@@ -173,6 +190,18 @@ class Tournament(Mapping):
         if not isinstance(new_competitor, TournamentPlayer):
             raise TournamentException("Competitors must be instances of TournamentPlayer.")
         self._competitors.append(new_competitor)
+        self._competitors_by_id[new_competitor.id] = new_competitor
+        self.update_standings(new_competitor)
+
+    def get_competitor(self, competitor_id: int) -> Union[TournamentPlayer, dict, None]:
+        """Return the competitor with the given id, or None if it does not take part in the tournament."""
+        return self._competitors_by_id.get(competitor_id)
+
+    def update_standings(self, *competitors: TournamentPlayer) -> None:
+        """Move competitors whose score changed to their new place in the standings."""
+        if self._standings is not None:
+            for competitor in competitors:
+                self._standings.update(competitor)
 
     def add_round(self, name: str, fixtures: List[Tuple[TournamentPlayer]]):
         """Add a new round to the tournament."""
@@ -186,10 +215,12 @@ class Tournament(Mapping):
 
             if p is None:
                 q.wins()
+                self.update_standings(q)
                 p_score = 0
                 q_score = 1
             if q is None:
                 p.wins()
+                self.update_standings(p)
                 p_score = 1
                 q_score = 0
 
@@ -200,6 +231,7 @@ class Tournament(Mapping):
         new_round = Round(name, matches)
         self._rounds.append(new_round)
 
+    @instrumentation.phase('serialize')
     def serialize(self):
         """Returns a lean dictionary of the instance."""
         dump = dict(self)
@@ -207,6 +239,10 @@ class Tournament(Mapping):
         dump['rounds'] = [ro.serialize() for ro in dump['rounds']]
         return dump
 
+    def _fields(self) -> tuple:
+        """The registries delete 'id' while storing a tournament, it is then left out of the Mapping."""
+        return self._FIELDS if hasattr(self, 'id') else self._FIELDS_WITHOUT_ID
+
     @property
     def name(self):
         return self._name
@@ -243,6 +279,15 @@ class Tournament(Mapping):
             self._competitors = []
         else:
             self._competitors = saved_competitors
+        self._competitors_by_id = {competitor['id']: competitor for competitor in self._competitors}
+        self._standings = None
+
+    @property
+    def standings(self) -> Standings:
+        """The competitors sorted by score then Elo, built on first use and then kept up to date."""
+        if self._standings is None:
+            self._standings = Standings(self._competitors)
+        return self._standings
 
     @property
     def rounds(self):
@@ -287,7 +332,8 @@ class Tournament(Mapping):
     def is_over(self):
         if len(self._rounds) < self._number_of_rounds:
             return False
-        return self.last_round.is_finished
+        # Rounds are plain dictionaries until the engine populates them.
+        return bool(self.last_round['end_date'])
 
     @property
     def start_date(self):
@@ -318,3 +364,39 @@ class Tournament(Mapping):
                 raise TournamentException(f'Invalid end_date for tournament (must be YYYY-mm-dd): {value}.')
         else:
             self._end_date = None
+
+
+class LazyTournament(Tournament):
+    """A tournament built from its header fields, its competitors and rounds are loaded on first access.
+
+    'load_content' returns a mapping holding the lean 'competitors' and 'rounds' of the tournament.
+    """
+
+    __slots__ = ('_load_content',)
+
+    # Left unset until the content is loaded, reading any of them triggers the load (see __getattr__).
+    _CONTENT_SLOTS = ('_competitors', '_competitors_by_id', '_standings', '_rounds')
+
+    def __init__(self,
+                 load_content: Callable[[], Mapping],
+                 name: str,
+                 location: str,
+                 number_of_rounds: int,
+                 time_control: str,
+                 description: str,
+                 start_date: Union[str, None] = None,
+                 end_date: Union[str, None] = None,
+                 id: Optional[int] = None):
+        super().__init__(name, location, number_of_rounds, time_control, description, start_date, end_date, id=id)
+        self._load_content = load_content
+        for slot in self._CONTENT_SLOTS:
+            delattr(self, slot)
+
+    def __getattr__(self, name):
+        if name not in self._CONTENT_SLOTS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        content = self._load_content()
+        self.competitors = content['competitors']
+        self.rounds = content['rounds']
+        return getattr(self, name)
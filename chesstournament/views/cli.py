@@ -1,6 +1,8 @@
+from typing import Optional, TextIO
+
 from chesstournament.views.players import PlayerCLIView
 from chesstournament.views.tournaments import TournamentCLIView
-from chesstournament.views.utils import UtilityCLIView
+from chesstournament.views.utils import OutputFormat, UtilityCLIView
 
 ROUND_NAME_PROMPT = 'round name'
 
@@ -21,6 +23,12 @@ class CLIView:
     def print_raw(self, message: str = "") -> None:
         self.utils_view.print_raw(message)
 
+    def set_output_format(self, output_format: OutputFormat) -> None:
+        self.utils_view.set_output_format(output_format)
+
+    def output_to(self, file: Optional[TextIO] = None, pager: bool = False):
+        return self.utils_view.output_to(file, pager)
+
     def print_tabular_data(self, header: tuple, items: list, heading: str = None, description: str = None) -> None:
         self.utils_view.print_tabular_data(header, items, heading, description)
 
@@ -30,6 +38,9 @@ class CLIView:
     def prompt_menu(self, menu_items: dict) -> any:
         return self.utils_view.prompt_menu(menu_items)
 
+    def set_input_source(self, input_source) -> None:
+        self.utils_view.set_input_source(input_source)
+
     # Player methods.
     def prompt_for_new_player(self) -> dict:
         return self.player_view.prompt_for_new_player()
@@ -1,5 +1,8 @@
+from typing import Iterable
+
 import typer
-from tabulate import tabulate
+
+from chesstournament.views.utils import UtilityCLIView
 
 FIRST_NAME_PROMPT = "first name"
 LAST_NAME_PROMPT = "last name"
@@ -25,12 +28,7 @@ class PlayerCLIView:
         return dict(zip(PLAYER_COLUMNS[1:], (first_name, last_name, birth_date, sex, elo)))
 
     @staticmethod
-    def print_players(players: list):
-        """Print a list of players to stdout."""
-        table = []
-        for player in players:
-            player_data = []
-            for field in PLAYER_COLUMNS:
-                player_data.append(player.get(field))
-            table.append(player_data)
-        typer.echo(f"\n{tabulate(table, PLAYER_COLUMNS, tablefmt='github')}")
+    def print_players(players: Iterable):
+        """Print players to stdout, as they come."""
+        rows = ([player.get(field) for field in PLAYER_COLUMNS] for player in players)
+        UtilityCLIView.print_table(PLAYER_COLUMNS, rows, prefix=("\n",))
@@ -0,0 +1,75 @@
+"""This module answers the prompts of the app from a scenario instead of the user.
+
+A scenario is a JSON array of answers, given in order to the prompts:
+    - menus take the key of an option (e.g. 2) or its label (e.g. "Mark as finished (irreversible)");
+    - values take the value to enter, null keeps the default value.
+ScenarioEnd is raised when a prompt comes after the last answer.
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable
+
+
+class ScenarioException(Exception):
+    """Raised when an answer does not fit the prompt it is given to."""
+
+    def __init__(self, message: str) -> None:
+        """
+        Args
+            message (str): description of the error
+        """
+        self.message = message
+        super().__init__(self.message)
+
+
+class ScenarioEnd(Exception):
+    """Raised when the scenario has no answer left."""
+
+
+class ScenarioInput:
+    """An input source for UtilityCLIView.set_input_source, replaying the answers of a scenario."""
+
+    def __init__(self, answers: Iterable) -> None:
+        self._answers = iter(answers)
+        self.answered = 0
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'ScenarioInput':
+        try:
+            with path.open(encoding='utf-8') as file:
+                answers = json.load(file)
+        except (OSError, ValueError) as error:
+            raise ScenarioException(f"Invalid scenario file '{path}': {error}")
+        if not isinstance(answers, list):
+            raise ScenarioException(f"Invalid scenario file '{path}': expected a JSON array of answers.")
+        return cls(answers)
+
+    def prompt_value(self, description: str, expected_type: type = None, default_value: str = None) -> any:
+        answer = self._next_answer()
+        if answer is None:
+            if default_value is None:
+                raise ScenarioException(f"Answer #{self.answered}: '{description}' has no default value.")
+            return default_value
+        try:
+            return answer if expected_type is None else expected_type(answer)
+        except (TypeError, ValueError):
+            raise ScenarioException(f"Answer #{self.answered}: invalid {description} '{answer}'.")
+
+    def prompt_menu(self, menu_items: dict) -> any:
+        answer = self._next_answer()
+        if answer in menu_items:
+            return answer
+        for key, label in menu_items.items():
+            if label == answer:
+                return key
+        raise ScenarioException(f"Answer #{self.answered}: '{answer}' is not one of the options "
+                                f"({', '.join(map(str, menu_items))}).")
+
+    def _next_answer(self):
+        try:
+            answer = next(self._answers)
+        except StopIteration:
+            raise ScenarioEnd()
+        self.answered += 1
+        return answer
@@ -1,5 +1,8 @@
+from typing import Iterable
+
 import typer
-from tabulate import tabulate
+
+from chesstournament.views.utils import UtilityCLIView
 
 TOURNAMENT_NAME_PROMPT = 'tournament name'
 TOURNAMENT_LOCATION_PROMPT = 'location'
@@ -35,15 +38,10 @@ class TournamentCLIView:
                         (name, location, number_of_rounds, time_control, description, start_date, end_date)))
 
     @staticmethod
-    def print_tournaments(tournaments: list):
-        """Print a list of tournaments to stdout"""
-        table = []
-        for tournament in tournaments:
-            tournament_data = []
-            for field in TOURNAMENT_COLUMNS:
-                tournament_data.append(tournament.get(field))
-            table.append(tournament_data)
-        typer.echo(f"\n{tabulate(table, TOURNAMENT_COLUMNS, tablefmt='github')}\n")
+    def print_tournaments(tournaments: Iterable):
+        """Print tournaments to stdout, as they come."""
+        rows = ([tournament.get(field) for field in TOURNAMENT_COLUMNS] for tournament in tournaments)
+        UtilityCLIView.print_table(TOURNAMENT_COLUMNS, rows, prefix=("\n",), suffix=("\n",))
 
     @staticmethod
     def print_match(p1_name: str, p2_name: str, p1_score: int, p2_score: int):
@@ -90,7 +88,5 @@ class TournamentCLIView:
                     r_data.append(field_data)
             table.append(r_data)
 
-        typer.echo(
-            f"\n[ {tournament_name} - Rounds Overview ]\n"
-            f"\n{tabulate(table, ROUND_OVERVIEW_COLUMNS, tablefmt='github')}\n"
-        )
+        UtilityCLIView.print_table(ROUND_OVERVIEW_COLUMNS, table,
+                                   prefix=(f"\n[ {tournament_name} - Rounds Overview ]\n", "\n"), suffix=("\n",))
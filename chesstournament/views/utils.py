@@ -1,11 +1,110 @@
 """CLI general purpose utilities."""
 
+import csv
+import io
+import itertools
+import json
+from contextlib import contextmanager
+from enum import Enum
+from numbers import Number
+from typing import Iterable, Iterator, Optional, Sequence, TextIO
+
 import click
 import typer
-from tabulate import tabulate
+
+from chesstournament import instrumentation
+
+# Column widths are computed from the first rows of a table, the following rows are written as they come.
+TABLE_SAMPLE_SIZE = 100
+
+
+class OutputFormat(str, Enum):
+    """Formats of the tabular data, 'table' is meant for humans, the others for scripts."""
+    TABLE = 'table'
+    JSON = 'json'
+    JSONL = 'jsonl'
+    CSV = 'csv'
+
+
+def render_table(header: Sequence[str], rows: Iterable[Sequence],
+                 sample_size: int = TABLE_SAMPLE_SIZE) -> Iterator[str]:
+    """Render rows as the lines of a GitHub style table, without holding more than 'sample_size' rows.
+
+    Numeric columns are right aligned. A cell wider than the values of the sample widens its own line only.
+    """
+    rows = iter(rows)
+    sample = [list(row) for row in itertools.islice(rows, sample_size)]
+    numeric = [any(_is_number(row[idx]) for row in sample)
+               and all(_is_number(row[idx]) or row[idx] is None for row in sample)
+               for idx in range(len(header))]
+    sample = [[_format_cell(value) for value in row] for row in sample]
+    widths = [max([len(title)] + [len(row[idx]) for row in sample]) for idx, title in enumerate(header)]
+
+    def line(cells) -> str:
+        return '| ' + ' | '.join(cell.rjust(width) if is_numeric else cell.ljust(width)
+                                 for cell, width, is_numeric in zip(cells, widths, numeric)) + ' |\n'
+
+    yield line(header)
+    yield '|' + '|'.join('-' * (width + 2) for width in widths) + '|\n'
+    for row in sample:
+        yield line(row)
+    for row in rows:
+        yield line([_format_cell(value) for value in row])
+
+
+def render_json_lines(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Render rows as JSON objects keyed by the header, one per line."""
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), default=str) + '\n'
+
+
+def render_json(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Render rows as a JSON array of objects keyed by the header, one object per line."""
+    separator = '[\n'
+    for line in render_json_lines(header, rows):
+        yield separator + line[:-1]
+        separator = ',\n'
+    yield '[]\n' if separator == '[\n' else '\n]\n'
+
+
+def render_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[str]:
+    """Render rows as CSV lines, the header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in itertools.chain((header,), rows):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+RENDERERS = {
+    OutputFormat.JSON: render_json,
+    OutputFormat.JSONL: render_json_lines,
+    OutputFormat.CSV: render_csv
+}
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _format_cell(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return format(value, 'g')
+    return str(value)
 
 
 class UtilityCLIView:
+    # Format and destination of the tables, see 'set_output_format' and 'output_to'.
+    _output_format = OutputFormat.TABLE
+    _output_file: Optional[TextIO] = None
+    _use_pager = False
+    # Answers the prompts instead of the user when set, see 'set_input_source'.
+    _input_source = None
+
     @staticmethod
     def print_success(message: str):
         """Prints a success message to stdout."""
@@ -21,17 +120,31 @@ class UtilityCLIView:
         """Prints a raw text message on stdout."""
         typer.echo(message)
 
-    @staticmethod
-    def prompt_value(description: str, expected_type: type = None, default_value: str = None) -> any:
+    @classmethod
+    def set_input_source(cls, input_source) -> None:
+        """Answer the prompts with 'input_source' instead of the user, None restores the user's input.
+
+        An input source provides 'prompt_value' and 'prompt_menu' methods, with the signatures of the ones below
+        (see views.scenario.ScenarioInput).
+        """
+        cls._input_source = input_source
+
+    @classmethod
+    def prompt_value(cls, description: str, expected_type: type = None, default_value: str = None) -> any:
+        if cls._input_source is not None:
+            return cls._input_source.prompt_value(description, expected_type, default_value)
         return typer.prompt(f"\n{description}", type=expected_type, default=default_value)
 
-    @staticmethod
-    def prompt_menu(menu_items: dict) -> any:
+    @classmethod
+    def prompt_menu(cls, menu_items: dict) -> any:
         """Prints a menu and prompts the user to make a choice.
 
         Arguments:
             menu_items -- a dictionary with options as keys and descriptions as values.
         """
+        if cls._input_source is not None:
+            return cls._input_source.prompt_menu(menu_items)
+
         typer.echo()
         menu_keys = sorted(menu_items.keys())
         for key in menu_keys:
@@ -43,21 +156,45 @@ class UtilityCLIView:
 
         return int(choice) if type(list(menu_items.keys())[0]) == int else choice
 
-    @staticmethod
-    def print_tabular_data(header: tuple, items: list, heading: str = None, description: str = None):
+    @classmethod
+    @contextmanager
+    def output_to(cls, file: Optional[TextIO] = None, pager: bool = False):
+        """Write the tables printed within the context to 'file', or through a pager, instead of stdout."""
+        cls._output_file, cls._use_pager = file, pager
+        try:
+            yield
+        finally:
+            cls._output_file, cls._use_pager = None, False
+
+    @classmethod
+    def set_output_format(cls, output_format: OutputFormat):
+        """Print tabular data as a table (default), JSON, JSON lines or CSV."""
+        cls._output_format = OutputFormat(output_format)
+
+    @classmethod
+    def print_table(cls, header: Sequence[str], rows: Iterable[Sequence], prefix: Iterable[str] = (),
+                    suffix: Iterable[str] = ()):
+        """Print rows in the current output format, 'prefix' and 'suffix' decorate tables only."""
+        if cls._output_format == OutputFormat.TABLE:
+            cls.write(itertools.chain(prefix, render_table(header, rows), suffix))
+        else:
+            cls.write(RENDERERS[cls._output_format](header, rows))
+
+    @instrumentation.phase('render')
+    @classmethod
+    def write(cls, chunks: Iterable[str]):
+        """Write text chunks as they come to the current destination of the tables (see 'output_to')."""
+        if cls._output_file is not None:
+            cls._output_file.writelines(chunks)
+        elif cls._use_pager:
+            click.echo_via_pager(chunks)
+        else:
+            for chunk in chunks:
+                typer.echo(chunk, nl=False)
+
+    @classmethod
+    def print_tabular_data(cls, header: tuple, items: Iterable, heading: str = None, description: str = None):
         """Print tabular item's data with its associated header, eventually with a heading."""
-        table = []
-        for item in items:
-            item_data = []
-            for field in header:
-                field_data = item.get(field, "N/A")
-                item_data.append(field_data)
-            table.append(item_data)
-
-        content = f"\n{tabulate(table, header, tablefmt='github')}\n"
-        if heading is not None:
-            content = f"\n[ {heading} ]\n" + content
-        if description is not None:
-            content += description
-
-        typer.echo(content)
+        rows = ([item.get(field, "N/A") for field in header] for item in items)
+        heading = () if heading is None else (f"\n[ {heading} ]\n",)
+        cls.print_table(header, rows, prefix=heading + ("\n",), suffix=(description or "", "\n"))
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from chesstournament.controllers import pairing
+from chesstournament.controllers.pairing import make_pairings
+from chesstournament.models.player import TournamentPlayer
+
+
+def ranked_field(size: int, group_size: int) -> list:
+    """Players ranked by id, their scores falling by one point every 'group_size' players."""
+    top_score = (size - 1) // group_size
+    return [TournamentPlayer(idx, 'first', 'last', '1990-01-01', 'm', 2800 - idx,
+                             score=top_score - (idx - 1) // group_size)
+            for idx in range(1, size + 1)]
+
+
+@pytest.fixture
+def without_search(monkeypatch):
+    """Make the backtracking search give up right away, so that the pairing falls back to the matching."""
+    monkeypatch.setattr(pairing, 'MIN_SEARCH_BUDGET', 0)
+    monkeypatch.setattr(pairing, 'SEARCH_BUDGET_PER_PLAYER', 0)
+
+
+def bye_recipients(fixtures: list) -> list:
+    return [player.id for player, opponent in fixtures if opponent is None]
+
+
+def test_bye_goes_to_the_lowest_ranked_player_without_a_bye():
+    players = ranked_field(41, 5)
+
+    fixtures = make_pairings(players, had_bye=[player.id for player in players[-11:]])
+
+    assert bye_recipients(fixtures) == [30]
+
+
+def test_bye_goes_to_the_lowest_ranked_player_when_all_had_one():
+    players = ranked_field(5, 1)
+
+    fixtures = make_pairings(players, had_bye=[player.id for player in players])
+
+    assert bye_recipients(fixtures) == [5]
+
+
+@pytest.mark.parametrize('size', [21, 41, 51, 101])
+def test_fallback_pairs_within_score_groups(without_search, size):
+    players = ranked_field(size, 5)
+
+    fixtures = make_pairings(players, had_bye=[player.id for player in players[-11:]])
+
+    pairs = [(player, opponent) for player, opponent in fixtures if opponent is not None]
+    assert (pairs[0][0].id, pairs[0][1].id) == (1, 2)
+    assert max(abs(player.score - opponent.score) for player, opponent in pairs) <= 1
+    assert bye_recipients(fixtures) == [size - 11]
+
+
+def test_fallback_finds_the_pairing_of_the_search():
+    rng = random.Random(42)
+    for _ in range(50):
+        size = rng.randrange(4, 40, 2)
+        forbidden = [set() for _ in range(size)]
+        for idx in range(size):
+            for other in range(idx + 1, size):
+                if rng.random() < 0.6:
+                    forbidden[idx].add(other)
+                    forbidden[other].add(idx)
+
+        partners = pairing._search(forbidden, 10 ** 6)
+        if partners is not None:
+            assert pairing._closest_matching(forbidden) == partners
+
+
+def test_fallback_pairs_as_many_players_as_possible_without_rematches():
+    # Players 0 to 3 have all faced each other, each of them can only play one of 4 and 5.
+    forbidden = [{1, 2, 3}, {0, 2, 3}, {0, 1, 3}, {0, 1, 2}, set(), set()]
+
+    partners = pairing._closest_matching(forbidden)
+
+    assert partners == [4, 5, -1, -1, 0, 1]
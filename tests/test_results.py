@@ -0,0 +1,31 @@
+from chesstournament.controllers.results import _read_pgn_tags
+
+PGN_GAMES = """[Event "Club championship"]
+[Round "3.1"]
+[White "Carlsen, Magnus"]
+[Black "Nepomniachtchi, Ian"]
+[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bb5 1-0
+
+[Board "2"]
+[White "Caruana, Fabiano"]
+[Black "Ding, Liren"]
+[Result "1/2-1/2"]
+
+1. d4 d5 1/2-1/2
+"""
+
+
+def test_pgn_games_with_different_tags_are_read_separately():
+    records = _read_pgn_tags(PGN_GAMES.splitlines(keepends=True))
+
+    assert records == [{'board': '1', 'result': '1-0'}, {'board': '2', 'result': '1/2-1/2'}]
+
+
+def test_pgn_games_without_move_text_are_read_separately():
+    lines = ['[Round "3.1"]\n', '[Result "0-1"]\n', '\n', '[Board "2"]\n', '[Result "1-0"]\n']
+
+    records = _read_pgn_tags(lines)
+
+    assert records == [{'board': '1', 'result': '0-1'}, {'board': '2', 'result': '1-0'}]
@@ -0,0 +1,43 @@
+import threading
+
+import pytest
+
+from chesstournament.models.storage import StorageException, TinyDBStorage, WriteBehindStorage
+
+
+class FailingOnceStorage(TinyDBStorage):
+    """A JSON storage whose first tournament write fails once the test lets it go."""
+
+    def __init__(self, db_path: str) -> None:
+        super().__init__(db_path)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+        self.failed = False
+
+    def update_tournament(self, doc_id, tournament):
+        if not self.failed:
+            self.failed = True
+            self.writing.set()
+            self.release.wait(5)
+            raise OSError("No space left on device")
+        return super().update_tournament(doc_id, tournament)
+
+
+def test_close_writes_the_pending_document_before_raising_a_failed_write(tmp_path):
+    db_path = str(tmp_path / 'db.json')
+    inner = FailingOnceStorage(db_path)
+    inner.insert_tournament({'name': 'v0'}, 1)
+    storage = WriteBehindStorage(inner)
+
+    storage.update_tournament(1, {'name': 'v1'})
+    assert inner.writing.wait(5)
+    # Queued while the background write of v1 is failing, before its error is reported.
+    storage.update_tournament(1, {'name': 'v2'})
+    inner.release.set()
+
+    with pytest.raises(StorageException):
+        storage.close()
+
+    reopened = TinyDBStorage(db_path)
+    assert reopened.get_tournament(1)['name'] == 'v2'
+    reopened.close()